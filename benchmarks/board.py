@@ -0,0 +1,44 @@
+import time
+
+from typing_extensions import Dict, Iterable
+
+from common.constants import DEFAULT_OCEAN_WIDTH
+from common.game import Board
+
+
+def time_board_generation(board_size: int, repeats: int) -> Dict[str, float]:
+    construction_times = []
+    environment_times = []
+    shore_query_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        board = Board(board_size, board_size, DEFAULT_OCEAN_WIDTH)
+        constructed = time.perf_counter()
+        board.place_environment()
+        placed = time.perf_counter()
+        board.get_shore_tiles()
+        queried = time.perf_counter()
+
+        construction_times.append(constructed - start)
+        environment_times.append(placed - constructed)
+        shore_query_times.append(queried - placed)
+
+    return {
+        "construction": min(construction_times),
+        "environment": min(environment_times),
+        "shore_query": min(shore_query_times),
+    }
+
+
+def run(board_sizes: Iterable[int] = (12, 64, 256), repeats: int = 3):
+    print(
+        f"{'size':>6} {'construct (ms)':>15} {'environment (ms)':>17} {'shores (ms)':>12}"
+    )
+    for board_size in board_sizes:
+        timings = time_board_generation(board_size, repeats)
+        print(
+            f"{board_size:>6} "
+            f"{timings['construction'] * 1000:>15.2f} "
+            f"{timings['environment'] * 1000:>17.2f} "
+            f"{timings['shore_query'] * 1000:>12.2f}"
+        )
@@ -0,0 +1,54 @@
+import pickle
+import time
+
+from typing_extensions import Callable, Dict, Iterable
+
+from common.constants import DEFAULT_OCEAN_WIDTH
+from common.enums import Corner
+from common.game import Game
+from common.serialization import decode_game, encode_game
+
+
+def best_time(function: Callable, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def time_serialization(board_size: int, repeats: int) -> Dict[str, float]:
+    game = Game(board_size, DEFAULT_OCEAN_WIDTH, seed=0)
+    game.add_player("first", Corner.TOP_LEFT)
+    game.add_player("second", Corner.BOTTOM_RIGHT)
+    game.start()
+
+    pickled = pickle.dumps(game)
+    encoded = encode_game(game)
+    return {
+        "pickle_size": len(pickled),
+        "pickle_dump": best_time(lambda: pickle.dumps(game), repeats),
+        "pickle_load": best_time(lambda: pickle.loads(pickled), repeats),
+        "binary_size": len(encoded),
+        "binary_encode": best_time(lambda: encode_game(game), repeats),
+        "binary_decode": best_time(lambda: decode_game(bytearray(encoded)), repeats),
+    }
+
+
+def run(board_sizes: Iterable[int] = (12, 64, 256), repeats: int = 5):
+    print(
+        f"{'size':>6} {'pickle (KB)':>12} {'dump (ms)':>10} {'load (ms)':>10}"
+        f" {'binary (KB)':>12} {'encode (ms)':>12} {'decode (ms)':>12}"
+    )
+    for board_size in board_sizes:
+        timings = time_serialization(board_size, repeats)
+        print(
+            f"{board_size:>6} "
+            f"{timings['pickle_size'] / 1024:>12.1f} "
+            f"{timings['pickle_dump'] * 1000:>10.2f} "
+            f"{timings['pickle_load'] * 1000:>10.2f} "
+            f"{timings['binary_size'] / 1024:>12.1f} "
+            f"{timings['binary_encode'] * 1000:>12.2f} "
+            f"{timings['binary_decode'] * 1000:>12.2f}"
+        )
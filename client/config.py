@@ -15,6 +15,8 @@ WINDOW_SIZE = (MENU_SIZE[0], MENU_SIZE[1] + BOARD_SIZE)
 
 WINDOW_TITLE = "Conqueror v2"
 
+ATTACK_PREVIEW_SAMPLES = 1000
+
 
 class UIStages(StrEnum):
     LOG_IN = "Log In"
@@ -1,18 +1,21 @@
 import json
 import os
-import pickle
+import zlib
 
 import httpx
 import websockets
-from typing_extensions import List, Optional
+from typing_extensions import Dict, List, Optional, Tuple
 
 from common.game import Game
+from common.serialization import decode_game
+from common.sync import COMPRESSED_FRAME
 
 
 class RequestManager:
     def __init__(self, api_url: str):
         self.api_url = api_url
         self.api_key = os.environ.get("API_KEY", "")
+        self.game_cache: Dict[str, Tuple[str, Game]] = {}
 
     async def get_game_list(self) -> List[str]:
         async with httpx.AsyncClient() as client:
@@ -43,21 +46,38 @@ class RequestManager:
             return response.status_code == 200
 
     async def get_game(self, game_id: str) -> Optional[Game]:
+        headers = {"x-api-key": self.api_key}
+        if cached := self.game_cache.get(game_id):
+            headers["If-None-Match"] = cached[0]
         async with httpx.AsyncClient() as client:
             response = await client.get(
-                url=f"{self.api_url}/game_state?game_id={game_id}"
+                url=f"{self.api_url}/game_state?game_id={game_id}",
+                headers=headers,
             )
+            if response.status_code == 304 and cached:
+                return cached[1]
             if response.status_code == 200:
-                game: Game = pickle.loads(response.content)
+                game = decode_game(bytearray(response.content))
+                if etag := response.headers.get("etag"):
+                    self.game_cache[game_id] = (etag, game)
                 return game
 
 
+def read_frame(message: str | bytes) -> str | bytes:
+    """Binary frames start with a flag byte telling whether the JSON is deflated."""
+    if isinstance(message, str):
+        return message
+    if message[:1] == COMPRESSED_FRAME:
+        return zlib.decompress(message[1:])
+    return message[1:]
+
+
 class SocketManager:
     def __init__(self, ws_url: str):
         self.ws_url = ws_url
 
     async def connect_game_socket(self, game_id: str):
-        socket_url = f"{self.ws_url}/ws/{game_id}"
+        socket_url = f"{self.ws_url}/ws/{game_id}?encoding=binary"
         async with websockets.connect(socket_url) as ws:
             async for message in ws:
-                yield json.loads(message)
+                yield json.loads(read_frame(message))
@@ -2,10 +2,12 @@ import asyncio
 import os
 from collections import defaultdict
 
-from common.game import Game
+from common.game import Game, War
+from common.sync import apply_delta, read_keyframe
 
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 
+import numpy as np
 import pygame
 import pygame_gui
 from dotenv import load_dotenv
@@ -32,6 +34,8 @@ element_visibilities: Dict[UIStages, Dict[UIElement, bool]] = {
 }
 current_game: Optional[Game] = None
 current_game_id: Optional[str] = None
+resync_task: Optional[asyncio.Task] = None
+preview_rng = np.random.default_rng()
 
 
 def get_element_by_id(element_id: str):
@@ -107,6 +111,33 @@ class WindowBoard:
                 else:
                     self.selected_tiles[1] = tile
                     tile.attacked = True
+                    self.preview_attack()
+
+    def tile_to_coordinates(self, tile: WindowTile):
+        for x, row in enumerate(self.tiles):
+            for y, window_tile in enumerate(row):
+                if window_tile is tile:
+                    return x, y
+        return None
+
+    def preview_attack(self):
+        if current_game and all(self.selected_tiles):
+            attacker_x, attacker_y = self.tile_to_coordinates(self.selected_tiles[0])
+            defender_x, defender_y = self.tile_to_coordinates(self.selected_tiles[1])
+            attacker = current_game.board.tiles[attacker_x][attacker_y]
+            defender = current_game.board.tiles[defender_x][defender_y]
+            if attacker.soldiers:
+                prediction = War(
+                    attacker.soldiers,
+                    defender.soldiers,
+                    defender.tower_count,
+                    defender.wall_count,
+                    preview_rng,
+                ).predict(ATTACK_PREVIEW_SAMPLES)
+                log_error(
+                    f"Win chance: {prediction.win_probability:.0%}, "
+                    f"expected losses: {prediction.means['attacker_damage']:.0%}"
+                )
 
     def pos_to_tile(self, pos):
         for row in self.tiles:
@@ -121,12 +152,12 @@ class WindowBoard:
                 tile.draw()
 
     def update_with_game_state(self):
-        for y in range(12):
-            for x in range(12):
-                if current_game:
-                    tile = current_game.board.tiles[y][x]
-                    if tile.faction:
-                        self.tiles[y][x].color = color_map[tile.faction.color]
+        if current_game:
+            board = current_game.board
+            faction_ids = board.faction_ids[: len(self.tiles), : len(self.tiles[0])]
+            for x, y in np.argwhere(faction_ids >= 0):
+                faction = board.factions[faction_ids[x, y]]
+                self.tiles[x][y].color = color_map[faction.color]
 
 
 async def game_loop():
@@ -226,12 +257,29 @@ def create_new_game(**kwargs):
     asyncio.gather(inner())
 
 
+async def resync(game_id: str, window_board: WindowBoard):
+    global current_game, resync_task
+    try:
+        if game := await request_manager.get_game(game_id):
+            current_game = game
+            window_board.update_with_game_state()
+    finally:
+        resync_task = None
+
+
 def process_update(update: dict, window_board: WindowBoard):
-    if update["type"] == "join":
-        current_game.add_player(
-            update["details"]["player_name"], update["details"]["corner"]
-        )
-        window_board.update_with_game_state()
+    global current_game, resync_task
+    if update["type"] not in ("delta", "keyframe") or not current_game:
+        return
+    if update["seq"] <= current_game.state_version:
+        return
+    if update["type"] == "keyframe":
+        current_game = read_keyframe(update)
+    elif not apply_delta(current_game, update):
+        if resync_task is None and current_game_id:
+            resync_task = asyncio.create_task(resync(current_game_id, window_board))
+        return
+    window_board.update_with_game_state()
 
 
 async def game_update_manager(game_id: str, window_board: WindowBoard):
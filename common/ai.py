@@ -0,0 +1,266 @@
+import time
+from concurrent.futures import Executor
+
+import numpy as np
+from typing_extensions import Dict, Iterator, List, Optional
+
+from common.constants import *
+from common.enums import *
+from common.game import Checkpoint, Game, Move, MoveTables, Player, Result
+from common.models import MakeMove
+
+
+class SearchSettings:
+    def __init__(self, beam_width: int, depth: int, budget_share: float):
+        self.beam_width = beam_width
+        self.depth = depth
+        self.budget_share = budget_share
+
+    @property
+    def time_budget(self) -> float:
+        return BOT_TURN_TIME_BUDGET * self.budget_share
+
+
+bot_settings: Dict[BotType, SearchSettings] = {
+    BotType.WEAK: SearchSettings(1, 2, 0.25),
+    BotType.MEDIUM: SearchSettings(3, 4, 0.5),
+    BotType.STRONG: SearchSettings(6, 6, 1.0),
+}
+
+
+class Plan:
+    def __init__(self, score: float, moves: List[MakeMove]):
+        self.score = score
+        self.moves = moves
+
+
+class Node:
+    def __init__(
+        self,
+        game: Game,
+        player_id: str,
+        moves: List[MakeMove],
+        finished: bool = False,
+    ):
+        self.player_id = player_id
+        self.moves = moves
+        self.finished = finished
+        self.score = evaluate(game, game.get_player(player_id))
+
+
+def evaluate(game: Game, player: Player) -> float:
+    faction = player.faction
+    territory = faction.territory
+    if not territory or not territory.tile_count:
+        return -np.inf
+    enemy_army = sum(
+        other.territory.army_size
+        for other in game.board.factions
+        if other is not faction and other.territory
+    )
+    return (
+        BOT_TILE_WEIGHT * territory.tile_count
+        + BOT_ARMY_WEIGHT * territory.army_size
+        + BOT_BUILDING_WEIGHT * territory.building_count
+        + BOT_RESOURCE_WEIGHT * float(faction.resources.amounts.sum())
+        - BOT_ENEMY_ARMY_WEIGHT * enemy_army
+    )
+
+
+def candidate_requests(game: Game, player: Player) -> Iterator[MakeMove]:
+    """Move requests worth checking, built lazily and interleaved by move type.
+
+    Attacks start from the largest armies and unit batches from the largest
+    size; the kinds take turns, so a short prefix covers all of them.
+    """
+    board = game.board
+    territory = player.faction.territory
+    owned = [
+        tuple(map(int, coordinates)) for coordinates in np.argwhere(territory.mask)
+    ]
+    frontier = [
+        tuple(map(int, coordinates))
+        for coordinates in np.argwhere(
+            board.dilate(territory.mask)
+            & ~territory.mask
+            & ~board.ocean_mask
+            & ~board.obstacle_mask
+        )
+    ]
+
+    def request(
+        action_type: MoveTypes,
+        first_tile,
+        target: Optional[str] = None,
+        amount: Optional[float] = None,
+        second_tile=None,
+    ) -> MakeMove:
+        return MakeMove(
+            player_id=player.id,
+            first_tile=first_tile,
+            second_tile=second_tile,
+            action_type=action_type,
+            amount=amount,
+            target=target,
+        )
+
+    def army_requests() -> Iterator[MakeMove]:
+        armies = board.army_counts.sum(axis=2)
+        for x, y in sorted(owned, key=lambda tile: -armies[tile]):
+            if not armies[x, y]:
+                break
+            for target in frontier:
+                for fraction in reversed(BOT_ARMY_FRACTIONS):
+                    yield request(
+                        MoveTypes.ARMY, (x, y), amount=fraction, second_tile=target
+                    )
+
+    def create_requests() -> Iterator[MakeMove]:
+        for count in sorted(BOT_CREATE_BATCHES, reverse=True):
+            for x, y in owned:
+                for unit_type in MoveTables.unit_types:
+                    yield request(MoveTypes.CREATE, (x, y), unit_type, count)
+
+    def build_requests() -> Iterator[MakeMove]:
+        for x, y in owned:
+            for building_type in MoveTables.building_classes:
+                yield request(MoveTypes.BUILD, (x, y), building_type)
+
+    def modify_requests() -> Iterator[MakeMove]:
+        for x, y in owned:
+            for defensive_building in DefensiveBuildings:
+                yield request(MoveTypes.MODIFY, (x, y), defensive_building)
+
+    streams = [army_requests(), create_requests(), build_requests(), modify_requests()]
+    while streams:
+        for stream in list(streams):
+            candidate = next(stream, None)
+            if candidate is None:
+                streams.remove(stream)
+            else:
+                yield candidate
+
+
+def candidate_moves(
+    game: Game,
+    player: Player,
+    limit: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> List[MakeMove]:
+    """Legal next moves in candidate_requests order, up to the limit or deadline."""
+    if not player.faction.territory:
+        return []
+    moves = []
+    for candidate in candidate_requests(game, player):
+        if deadline is not None and time.monotonic() > deadline:
+            break
+        move = Move.parse(player, candidate)
+        if move is not None and move.validate(game):
+            moves.append(candidate)
+            if limit is not None and len(moves) >= limit:
+                break
+    return moves
+
+
+def follow(game: Game, player: Player, moves: List[MakeMove]) -> Checkpoint:
+    """Plays moves on the game in place; restore the checkpoint to take them back."""
+    checkpoint = Checkpoint(game)
+    result = Result(player.id)
+    for move in moves:
+        game.process_move(player, move, result, checkpoint)
+    return checkpoint
+
+
+def expand(game: Game, node: Node, move: MakeMove) -> Optional[Node]:
+    """Scores the node's line extended by move, leaving the game as it was."""
+    player = game.get_player(node.player_id)
+    checkpoint = Checkpoint(game)
+    try:
+        if not game.process_move(player, move, Result(player.id), checkpoint):
+            return None
+        return Node(
+            game,
+            player.id,
+            node.moves + [move],
+            move.action_type == MoveTypes.ARMY,
+        )
+    finally:
+        checkpoint.restore()
+
+
+def search_turn(
+    game: Game,
+    player_id: str,
+    settings: SearchSettings,
+    root_moves: Optional[List[MakeMove]] = None,
+) -> Plan:
+    """Beam search over one turn; army moves end a line since battles are random.
+
+    Lines are replayed on the one game and taken back with checkpoints, and
+    each node only expands its first BOT_CANDIDATE_LIMIT candidates.
+    """
+    deadline = time.monotonic() + settings.time_budget
+    player = game.get_player(player_id)
+    root = Node(game, player_id, [])
+    best = root
+    beam = [root]
+    for depth in range(settings.depth):
+        children = []
+        for node in beam:
+            if time.monotonic() > deadline:
+                break
+            line = follow(game, player, node.moves)
+            moves = (
+                root_moves
+                if depth == 0 and root_moves is not None
+                else candidate_moves(game, player, BOT_CANDIDATE_LIMIT, deadline)
+            )
+            for move in moves:
+                if time.monotonic() > deadline:
+                    break
+                if child := expand(game, node, move):
+                    children.append(child)
+            line.restore()
+        if not children:
+            break
+        children.sort(key=lambda child: child.score, reverse=True)
+        if children[0].score > best.score:
+            best = children[0]
+        beam = [child for child in children if not child.finished]
+        beam = beam[: settings.beam_width]
+        if not beam or time.monotonic() > deadline:
+            break
+    return Plan(best.score, best.moves)
+
+
+def plan_turn(
+    game: Game, player_id: str, executor: Optional[Executor] = None
+) -> List[MakeMove]:
+    """Moves for the bot's next turn, splitting root moves across the pool if given."""
+    game = game.fork()
+    game.timing_hook = None
+    player = game.get_player(player_id)
+    settings = bot_settings[player.bot_type or BotType.MEDIUM]
+    if executor is None:
+        return search_turn(game, player_id, settings).moves
+
+    root_moves = candidate_moves(
+        game,
+        player,
+        BOT_CANDIDATE_LIMIT,
+        time.monotonic() + settings.time_budget,
+    )
+    if not root_moves:
+        return []
+    futures = [
+        executor.submit(
+            search_turn,
+            game,
+            player_id,
+            settings,
+            root_moves[worker::BOT_SEARCH_WORKERS],
+        )
+        for worker in range(min(BOT_SEARCH_WORKERS, len(root_moves)))
+    ]
+    plans = [future.result() for future in futures]
+    return max(plans, key=lambda plan: plan.score).moves
@@ -34,6 +34,8 @@ CAPITAL_TREASURE = (0.0, 0.0, 0.0)
 EMPTY_CORNER_TREASURE = (0.0, 0.0, 0.0)
 
 ATTACK_MOVE_PER_TILE = 0.125
+ARMY_MOVE_BUDGET = 1.0
+MAX_MOVE_AMOUNT = 10000
 
 INITIAL_RESOURCES = (0.0, 0.0, 0.0)
 
@@ -56,6 +58,19 @@ CANNON_COST = (0.0, 0.0, 0.0)
 SOLDIER_UNSHELTERED_ROUND_COST = (0.0, 0.0, 0.0)
 SOLDIER_TRANSPORT_ROUND_COST = (0.0, 0.0, 0.0)
 
+HOUSE_COST = (0.0, 0.0, 0.0)
+MILITARY_CAMP_COST = (0.0, 0.0, 0.0)
+
+FARM_COST = (0.0, 0.0, 0.0)
+WOODCUTTER_COST = (0.0, 0.0, 0.0)
+MINE_COST = (0.0, 0.0, 0.0)
+
+BARRACK_COST = (0.0, 0.0, 0.0)
+STABLE_COST = (0.0, 0.0, 0.0)
+FACTORY_COST = (0.0, 0.0, 0.0)
+
+DOCK_COST = (0.0, 0.0, 0.0)
+
 WALL_COST = (0.0, 0.0, 0.0)
 
 TOWER_COST = (0.0, 0.0, 0.0)
@@ -74,3 +89,30 @@ COUNTERED = 0.75
 HEAVILY_COUNTERED = 0.50
 
 LUCK_FACTOR = 0.1
+
+POWER_CACHE_SIZE = 4096
+
+ROUT_DAMAGE_RATE = 0.75
+
+PATH_CACHE_SIZE = 256
+SPATIAL_INDEX_CACHE_SIZE = 8
+
+BOT_TURN_TIME_BUDGET = 1.0
+BOT_SEARCH_WORKERS = 2
+BOT_CANDIDATE_LIMIT = 48
+BOT_ARMY_FRACTIONS = (0.5, 1.0)
+BOT_CREATE_BATCHES = (1, 5)
+
+BOT_TILE_WEIGHT = 10.0
+BOT_ARMY_WEIGHT = 1.0
+BOT_BUILDING_WEIGHT = 3.0
+BOT_RESOURCE_WEIGHT = 0.1
+BOT_ENEMY_ARMY_WEIGHT = 0.5
+
+SYNC_KEYFRAME_INTERVAL = 32
+
+SEND_QUEUE_SIZE = 64
+SLOW_CONSUMER_POLICY = "Coalesce"
+
+BROADCAST_COMPRESSION_THRESHOLD = 4096
+BROADCAST_COMPRESSION_LEVEL = 1
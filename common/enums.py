@@ -73,3 +73,9 @@ class MoveTypes(StrEnum):
     CREATE = "Create"
     MODIFY = "Modify"
     TRANSFER = "Transfer"
+
+
+class SlowConsumerPolicy(StrEnum):
+    DROP = "Drop"
+    COALESCE = "Coalesce"
+    DISCONNECT = "Disconnect"
@@ -1,62 +1,93 @@
-import random
+import copy
+import time
 import uuid
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from collections import OrderedDict, deque
+from functools import lru_cache
 
-from typing_extensions import Dict, List, Optional, Tuple, Type
+import numpy as np
+from typing_extensions import Callable, Dict, List, Optional, Set, Tuple, Type
 
 from common.constants import *
 from common.enums import *
 from common.models import MakeMove
+from common.naval import NavalGraph
+from common.pathfinding import Pathfinder
 
+resource_type_order: List[ResourceType] = list(ResourceType)
+resource_indices: Dict[ResourceType, int] = {
+    resource_type: index for index, resource_type in enumerate(resource_type_order)
+}
 
-class Resource(ABC):
-    resource_type: ResourceType
 
-    @abstractmethod
-    def __init__(self, amount: float):
-        self._amount = amount
+class ResourceBundle:
+    __slots__ = ("amounts",)
 
-    def __add__(self, other):
-        assert isinstance(other, self.__class__)
-        return self.__class__(self._amount + other._amount)
+    def __init__(self, amounts: Tuple[float, float, float] = (0.0, 0.0, 0.0)):
+        self.amounts = np.array(amounts, dtype=float)
 
-    def __sub__(self, other):
-        assert isinstance(other, self.__class__)
-        return self.__class__(self._amount - other._amount)
+    @classmethod
+    def view(cls, amounts: np.ndarray) -> "ResourceBundle":
+        bundle = cls.__new__(cls)
+        bundle.amounts = amounts
+        return bundle
 
-    def __ge__(self, other):
-        assert isinstance(other, self.__class__)
-        return self._amount >= other._amount
+    @classmethod
+    def single(cls, resource_type: ResourceType, amount: float) -> "ResourceBundle":
+        bundle = cls()
+        bundle.amounts[resource_indices[resource_type]] = amount
+        return bundle
 
-    @staticmethod
-    def objectify(costs: Tuple[float, float, float]):
-        return {
-            ResourceType.FOOD: Food(costs[0]),
-            ResourceType.WOOD: Wood(costs[1]),
-            ResourceType.METAL: Metal(costs[2]),
-        }
+    def copy(self) -> "ResourceBundle":
+        return ResourceBundle(self.amounts)
+
+    def to_tuple(self) -> Tuple[float, float, float]:
+        food, wood, metal = self.amounts.tolist()
+        return food, wood, metal
 
+    def __getitem__(self, resource_type: ResourceType) -> float:
+        return float(self.amounts[resource_indices[resource_type]])
 
-class Food(Resource):
-    resource_type = ResourceType.FOOD
+    def __setitem__(self, resource_type: ResourceType, amount: float):
+        self.amounts[resource_indices[resource_type]] = amount
 
-    def __init__(self, amount: float):
-        super().__init__(amount)
+    def __iadd__(self, other: "ResourceBundle"):
+        self.amounts += other.amounts
+        return self
 
+    def __isub__(self, other: "ResourceBundle"):
+        self.amounts -= other.amounts
+        return self
 
-class Wood(Resource):
-    resource_type = ResourceType.WOOD
+    def __imul__(self, factor: float):
+        self.amounts *= factor
+        return self
 
-    def __init__(self, amount: float):
-        super().__init__(amount)
+    def __add__(self, other: "ResourceBundle") -> "ResourceBundle":
+        return ResourceBundle.view(self.amounts + other.amounts)
 
+    def __sub__(self, other: "ResourceBundle") -> "ResourceBundle":
+        return ResourceBundle.view(self.amounts - other.amounts)
+
+    def __mul__(self, factor: float) -> "ResourceBundle":
+        return ResourceBundle.view(self.amounts * factor)
+
+    def __ge__(self, other: "ResourceBundle") -> bool:
+        return bool((self.amounts >= other.amounts).all())
+
+    def __le__(self, other: "ResourceBundle") -> bool:
+        return bool((self.amounts <= other.amounts).all())
+
+    def __eq__(self, other):
+        return isinstance(other, ResourceBundle) and bool(
+            (self.amounts == other.amounts).all()
+        )
 
-class Metal(Resource):
-    resource_type = ResourceType.METAL
+    def __repr__(self):
+        return f"ResourceBundle({self.to_tuple()})"
 
-    def __init__(self, amount: float):
-        super().__init__(amount)
+    def add_scaled(self, other: "ResourceBundle", factor: float):
+        self.amounts += other.amounts * factor
 
 
 corner_colors = {
@@ -70,8 +101,9 @@ corner_colors = {
 class Faction:
     def __init__(self, color: str):
         self.color = color
-        self.resources = Resource.objectify(INITIAL_RESOURCES)
-        self.controlled_tiles: List[Tile] = []
+        self.resources = ResourceBundle(INITIAL_RESOURCES)
+        self.territory: Optional[Territory] = None
+        self.distance_field: Optional[DistanceField] = None
         self.unlocked_buildings: Dict[BuildingType, bool] = {
             BuildingType.HOUSE: True,
             BuildingType.MILITARY_CAMP: True,
@@ -84,6 +116,17 @@ class Faction:
             BuildingType.DOCK: True,
         }
 
+    def fork(self, board: "Board") -> "Faction":
+        faction = Faction.__new__(Faction)
+        faction.color = self.color
+        faction.resources = self.resources.copy()
+        faction.territory = self.territory.fork(board) if self.territory else None
+        faction.distance_field = (
+            self.distance_field.fork(board) if self.distance_field else None
+        )
+        faction.unlocked_buildings = dict(self.unlocked_buildings)
+        return faction
+
     def unlock_building(self, distance_to_capital: int):
         if distance_to_capital == 1:
             self.unlocked_buildings[BuildingType.WOODCUTTER] = True
@@ -92,39 +135,82 @@ class Faction:
             self.unlocked_buildings[BuildingType.MINE] = True
             self.unlocked_buildings[BuildingType.FACTORY] = True
 
-    def add_resource(self, resource: Resource):
-        self.resources[resource.resource_type] += resource
+    def set_capital(self, capital: "Tile"):
+        board = capital.board
+        faction_id = board.register_faction(self)
+        self.territory = Territory(board, faction_id, (capital.x, capital.y))
+        self.distance_field = DistanceField(board, faction_id, (capital.x, capital.y))
+
+    @property
+    def controlled_tiles(self) -> List["Tile"]:
+        if self.territory:
+            return self.territory.get_tiles()
+        return []
+
+    def controls(self, tile: "Tile") -> bool:
+        return bool(self.territory and self.territory.contains(tile.x, tile.y))
+
+    def gain_tile(self, tile: "Tile"):
+        if not self.territory:
+            board = tile.board
+            self.territory = Territory(board, board.register_faction(self), None)
+        self.territory.add(tile)
+        if self.distance_field:
+            self.distance_field.tile_gained(tile.x, tile.y)
+            self.unlock_building(self.distance_to_capital(tile.x, tile.y))
+
+    def lose_tile(self, tile: "Tile"):
+        if self.territory:
+            self.territory.remove(tile)
+        if self.distance_field:
+            self.distance_field.tile_lost(tile.x, tile.y)
+
+    def distance_to_capital(self, x: int, y: int) -> Optional[int]:
+        if self.distance_field:
+            return int(self.distance_field.chebyshev[x, y])
+        return None
 
-    def has_resource(self, resource: Resource) -> bool:
-        return self.resources[resource.resource_type] >= resource
+    def walking_distance(self, x: int, y: int) -> Optional[int]:
+        if self.distance_field:
+            return self.distance_field.walking_distance(x, y)
+        return None
 
-    def has_resources(self, resources: Dict[ResourceType, Resource]) -> bool:
-        for resource_type, resource_amount in resources.items():
-            if self.resources[resource_type] < resource_amount:
-                return False
-        return True
+    def invalidate_distances(self):
+        if self.distance_field:
+            self.distance_field.dirty = True
 
-    def use_resource(self, resource: Resource):
-        self.resources[resource.resource_type] -= resource
+    def add_resources(self, resources: ResourceBundle):
+        self.resources += resources
 
-    def use_resources(self, resources: Dict[ResourceType, Resource]):
-        for resource_type, resource_amount in resources.items():
-            self.resources[resource_type] -= resource_amount
+    def has_resources(self, resources: ResourceBundle) -> bool:
+        return self.resources >= resources
+
+    def use_resources(self, resources: ResourceBundle):
+        self.resources -= resources
 
 
 class Unit(ABC):
     unit_type: UnitType
-    cost: Dict[ResourceType, Resource]
+    cost: ResourceBundle
 
     @abstractmethod
     def get_properties(self) -> Dict:
         return {}
 
+    @classmethod
+    @abstractmethod
+    def from_properties(cls, properties: Dict) -> "Unit":
+        pass
+
+    @staticmethod
+    def signature(properties: Dict) -> Tuple:
+        return tuple(sorted(properties.items()))
+
 
 class Worker(Unit):
     unit_type = UnitType.WORKER
-    cost = Resource.objectify(WORKER_COST)
-    tool_cost = Resource.objectify(WORKER_TOOL_COST)
+    cost = ResourceBundle(WORKER_COST)
+    tool_cost = ResourceBundle(WORKER_TOOL_COST)
 
     def __init__(self):
         self.has_tool = False
@@ -135,44 +221,37 @@ class Worker(Unit):
     def get_properties(self) -> Dict[str, bool]:
         return {"has_tool": self.has_tool}
 
+    @classmethod
+    def from_properties(cls, properties: Dict) -> "Worker":
+        worker = cls()
+        if properties.get("has_tool"):
+            worker.equip_tool()
+        return worker
+
 
 class Soldier(Unit):
     unit_type = UnitType.SOLDIER
     soldier_type: InfantryUnitType | CavalryUnitType | SiegeUnitType
-    unsheltered_round_cost = Resource.objectify(SOLDIER_UNSHELTERED_ROUND_COST)
-    transport_round_cost = Resource.objectify(SOLDIER_TRANSPORT_ROUND_COST)
+    unsheltered_round_cost = ResourceBundle(SOLDIER_UNSHELTERED_ROUND_COST)
+    transport_round_cost = ResourceBundle(SOLDIER_TRANSPORT_ROUND_COST)
 
     @abstractmethod
     def __init__(self):
-        self.is_sheltered = False
-        self.is_transport = False
-
-    def calculate_round_cost(self) -> Dict[ResourceType, Resource]:
-        total_cost = {
-            ResourceType.FOOD: Food(0),
-            ResourceType.WOOD: Wood(0),
-            ResourceType.METAL: Metal(0),
-        }
-
-        if not self.is_sheltered:
-            for resource_type, cost in Soldier.unsheltered_round_cost.items():
-                total_cost[resource_type] += cost
-
-        if self.is_transport:
-            for resource_type, cost in Soldier.transport_round_cost.items():
-                total_cost[resource_type] += cost
-
-        return total_cost
+        pass
 
     def get_properties(
         self,
     ) -> Dict[str, InfantryUnitType | CavalryUnitType | SiegeUnitType]:
         return {"soldier_type": self.soldier_type}
 
+    @classmethod
+    def from_properties(cls, properties: Dict) -> "Soldier":
+        return soldier_classes[properties["soldier_type"]]()
+
 
 class Swordsman(Soldier):
     soldier_type = InfantryUnitType.SWORDSMAN
-    cost = Resource.objectify(SWORDSMAN_COST)
+    cost = ResourceBundle(SWORDSMAN_COST)
 
     def __init__(self):
         super().__init__()
@@ -180,7 +259,7 @@ class Swordsman(Soldier):
 
 class Spearman(Soldier):
     soldier_type = InfantryUnitType.SPEARMAN
-    cost = Resource.objectify(SPEARMAN_COST)
+    cost = ResourceBundle(SPEARMAN_COST)
 
     def __init__(self):
         super().__init__()
@@ -188,7 +267,7 @@ class Spearman(Soldier):
 
 class Archer(Soldier):
     soldier_type = InfantryUnitType.ARCHER
-    cost = Resource.objectify(ARCHER_COST)
+    cost = ResourceBundle(ARCHER_COST)
 
     def __init__(self):
         super().__init__()
@@ -196,7 +275,7 @@ class Archer(Soldier):
 
 class LightCavalry(Soldier):
     soldier_type = CavalryUnitType.LIGHT_CAVALRY
-    cost = Resource.objectify(LIGHT_CAVALRY_COST)
+    cost = ResourceBundle(LIGHT_CAVALRY_COST)
 
     def __init__(self):
         super().__init__()
@@ -204,7 +283,7 @@ class LightCavalry(Soldier):
 
 class HeavyCavalry(Soldier):
     soldier_type = CavalryUnitType.HEAVY_CAVALRY
-    cost = Resource.objectify(HEAVY_CAVALRY_COST)
+    cost = ResourceBundle(HEAVY_CAVALRY_COST)
 
     def __init__(self):
         super().__init__()
@@ -212,7 +291,7 @@ class HeavyCavalry(Soldier):
 
 class HorseArcher(Soldier):
     soldier_type = CavalryUnitType.HORSE_ARCHER
-    cost = Resource.objectify(HORSE_ARCHER_COST)
+    cost = ResourceBundle(HORSE_ARCHER_COST)
 
     def __init__(self):
         super().__init__()
@@ -220,31 +299,295 @@ class HorseArcher(Soldier):
 
 class Cannon(Soldier):
     soldier_type = SiegeUnitType.CANNON
-    cost = Resource.objectify(CANNON_COST)
+    cost = ResourceBundle(CANNON_COST)
 
     def __init__(self):
         super().__init__()
 
 
+tile_type_order: List[TileType] = list(TileType)
+
+
+soldier_type_order: List[InfantryUnitType | CavalryUnitType | SiegeUnitType] = [
+    *InfantryUnitType,
+    *CavalryUnitType,
+    *SiegeUnitType,
+]
+soldier_indices: Dict[InfantryUnitType | CavalryUnitType | SiegeUnitType, int] = {
+    soldier_type: index for index, soldier_type in enumerate(soldier_type_order)
+}
+soldier_classes: Dict[
+    InfantryUnitType | CavalryUnitType | SiegeUnitType, Type[Soldier]
+] = {
+    soldier_class.soldier_type: soldier_class
+    for soldier_class in [
+        Swordsman,
+        Spearman,
+        Archer,
+        LightCavalry,
+        HeavyCavalry,
+        HorseArcher,
+        Cannon,
+    ]
+}
+
+
+class Army:
+    __slots__ = ("counts", "status")
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        self.counts = np.zeros(len(soldier_type_order), dtype=np.int32)
+        if counts is not None:
+            self.counts[:] = counts
+        self.status = np.zeros(2, dtype=np.int32)
+
+    @classmethod
+    def view(cls, counts: np.ndarray, status: np.ndarray) -> "Army":
+        army = cls.__new__(cls)
+        army.counts = counts
+        army.status = status
+        return army
+
+    @classmethod
+    def of(
+        cls,
+        soldier_types: Dict[InfantryUnitType | CavalryUnitType | SiegeUnitType, int],
+    ):
+        army = cls()
+        for soldier_type, count in soldier_types.items():
+            army.add(soldier_type, count)
+        return army
+
+    @property
+    def sheltered(self) -> int:
+        return int(self.status[0])
+
+    @sheltered.setter
+    def sheltered(self, sheltered: int):
+        self.status[0] = sheltered
+
+    @property
+    def transport(self) -> int:
+        return int(self.status[1])
+
+    @transport.setter
+    def transport(self, transport: int):
+        self.status[1] = transport
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def __bool__(self):
+        return bool(self.counts.any())
+
+    def __repr__(self):
+        return f"Army({self.to_dict()})"
+
+    def to_dict(self) -> Dict[InfantryUnitType | CavalryUnitType | SiegeUnitType, int]:
+        return {
+            soldier_type: int(count)
+            for soldier_type, count in zip(soldier_type_order, self.counts)
+            if count
+        }
+
+    def count(
+        self, soldier_type: InfantryUnitType | CavalryUnitType | SiegeUnitType
+    ) -> int:
+        return int(self.counts[soldier_indices[soldier_type]])
+
+    def add(
+        self,
+        soldier_type: InfantryUnitType | CavalryUnitType | SiegeUnitType,
+        count: int = 1,
+    ):
+        self.counts[soldier_indices[soldier_type]] += count
+
+    def remove(
+        self,
+        soldier_type: InfantryUnitType | CavalryUnitType | SiegeUnitType,
+        count: int = 1,
+    ) -> bool:
+        index = soldier_indices[soldier_type]
+        if self.counts[index] < count:
+            return False
+        self.counts[index] -= count
+        self.clamp_status()
+        return True
+
+    def merge(self, other: "Army"):
+        self.counts += other.counts
+        self.status += other.status
+        other.clear()
+
+    def split(self, counts: np.ndarray) -> Optional["Army"]:
+        if (counts > self.counts).any():
+            return None
+        self.counts -= counts
+        self.clamp_status()
+        return Army(counts)
+
+    def split_fraction(self, fraction: float) -> "Army":
+        return self.split(np.floor(self.counts * fraction).astype(np.int32))
+
+    def clear(self):
+        self.counts[:] = 0
+        self.status[:] = 0
+
+    def clamp_status(self):
+        np.minimum(self.status, self.counts.sum(), out=self.status)
+
+    def add_round_cost(self, total_cost: ResourceBundle):
+        total_cost.add_scaled(
+            Soldier.unsheltered_round_cost, len(self) - self.sheltered
+        )
+        total_cost.add_scaled(Soldier.transport_round_cost, self.transport)
+
+    def calculate_round_cost(self) -> ResourceBundle:
+        total_cost = ResourceBundle()
+        self.add_round_cost(total_cost)
+        return total_cost
+
+
 class Tile:
-    def __init__(self, x: int, y: int):
+    __slots__ = ("board", "x", "y")
+    building_capacity = TILE_BUILDING_CAPACITY
+
+    def __init__(self, board: "Board", x: int, y: int):
+        self.board = board
         self.x = x
         self.y = y
-        self.type: Optional[TileType] = None
-        self.shore = False
-        self.max_hp: float = 0.0
-        self.hp: float = 0.0
-        self.faction: Optional[Faction] = None
-        self.buildings: List["Building"] = []
-        self.soldiers: List[Unit] = []
-        self.treasure: dict[ResourceType, Food | Wood | Metal] = {
-            ResourceType.FOOD: Food(0),
-            ResourceType.WOOD: Wood(0),
-            ResourceType.METAL: Metal(0),
-        }
-        self.building_capacity = TILE_BUILDING_CAPACITY
-        self.tower_count = 0
-        self.wall_count = 0.0
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Tile)
+            and self.board is other.board
+            and self.x == other.x
+            and self.y == other.y
+        )
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"Tile({self.x}, {self.y})"
+
+    @property
+    def type(self) -> Optional[TileType]:
+        type_code = self.board.tile_types[self.x, self.y]
+        return tile_type_order[type_code] if type_code >= 0 else None
+
+    @type.setter
+    def type(self, tile_type: Optional[TileType]):
+        self.board.tile_types[self.x, self.y] = (
+            tile_type_order.index(tile_type) if tile_type is not None else -1
+        )
+        self.board.version += 1
+
+    @property
+    def shore(self) -> bool:
+        return self.board.is_shore(self.x, self.y)
+
+    @property
+    def max_hp(self) -> float:
+        return float(self.board.max_hp[self.x, self.y])
+
+    @max_hp.setter
+    def max_hp(self, max_hp: float):
+        self.board.max_hp[self.x, self.y] = max_hp
+
+    @property
+    def hp(self) -> float:
+        return float(self.board.hp[self.x, self.y])
+
+    @hp.setter
+    def hp(self, hp: float):
+        self.board.hp[self.x, self.y] = hp
+
+    @property
+    def faction(self) -> Optional[Faction]:
+        return self.board.get_faction(self.board.faction_ids[self.x, self.y])
+
+    @faction.setter
+    def faction(self, faction: Optional[Faction]):
+        self.board.faction_ids[self.x, self.y] = self.board.register_faction(faction)
+        self.board.version += 1
+
+    @property
+    def buildings(self) -> List["Building"]:
+        return self.board.buildings.get((self.x, self.y), [])
+
+    @buildings.setter
+    def buildings(self, buildings: List["Building"]):
+        had_dock = self.has_building(BuildingType.DOCK)
+        self.board.buildings_changed(
+            self.x,
+            self.y,
+            len(buildings) - len(self.board.buildings.get((self.x, self.y), ())),
+        )
+        if buildings:
+            self.board.buildings[(self.x, self.y)] = buildings
+        else:
+            self.board.buildings.pop((self.x, self.y), None)
+        has_dock = self.has_building(BuildingType.DOCK)
+        if had_dock and not has_dock:
+            self.board.naval.remove_dock(self.x, self.y)
+            self.board.version += 1
+        elif has_dock and not had_dock:
+            self.board.naval.add_dock(self.x, self.y)
+            self.board.version += 1
+
+    def add_building(self, building: "Building"):
+        self.board.buildings.setdefault((self.x, self.y), []).append(building)
+        self.board.buildings_changed(self.x, self.y, 1)
+        if building.building_type == BuildingType.DOCK:
+            self.board.naval.add_dock(self.x, self.y)
+            self.board.version += 1
+
+    def has_building(self, building_type: BuildingType) -> bool:
+        return any(
+            building.building_type == building_type
+            for building in self.board.buildings.get((self.x, self.y), ())
+        )
+
+    @property
+    def soldiers(self) -> Army:
+        return Army.view(
+            self.board.army_counts[self.x, self.y],
+            self.board.army_status[self.x, self.y],
+        )
+
+    @soldiers.setter
+    def soldiers(self, soldiers: Army):
+        self.board.army_counts[self.x, self.y] = soldiers.counts
+        self.board.army_status[self.x, self.y] = soldiers.status
+
+    @property
+    def treasure(self) -> ResourceBundle:
+        return ResourceBundle.view(self.board.treasures[self.x, self.y])
+
+    @treasure.setter
+    def treasure(self, treasure: ResourceBundle):
+        self.board.treasures[self.x, self.y] = treasure.amounts
+
+    @property
+    def resident_epoch(self) -> int:
+        return int(self.board.resident_epochs[self.x, self.y])
+
+    @property
+    def tower_count(self) -> int:
+        return int(self.board.tower_counts[self.x, self.y])
+
+    @tower_count.setter
+    def tower_count(self, tower_count: int):
+        self.board.tower_counts[self.x, self.y] = tower_count
+
+    @property
+    def wall_count(self) -> float:
+        return float(self.board.wall_counts[self.x, self.y])
+
+    @wall_count.setter
+    def wall_count(self, wall_count: float):
+        self.board.wall_counts[self.x, self.y] = wall_count
 
     def build_walls(self):
         self.wall_count += 1.0
@@ -263,8 +606,10 @@ class Tile:
         return self.tower_count * ARCHERY_POWER_PER_TOWER
 
     def change_faction(self, faction: Faction):
+        previous_faction = self.faction
+        if previous_faction:
+            previous_faction.lose_tile(self)
         self.hp = self.max_hp
-        self.faction = faction
         self.buildings = [
             building
             for building in self.buildings
@@ -276,39 +621,208 @@ class Tile:
                 BuildingType.MILITARY_CAMP,
             ]
         ]
-        self.soldiers = []
+        self.soldiers.clear()
         self.wall_count = 0
-        for building in self.buildings:
-            if isinstance(building, ResidentialBuilding):
-                building.residents = []
+        self.board.resident_epochs[self.x, self.y] += 1
+        self.faction = faction
+        if faction:
+            faction.gain_tile(self)
+
+
+class TileColumn:
+    __slots__ = ("board", "x")
+
+    def __init__(self, board: "Board", x: int):
+        self.board = board
+        self.x = x
+
+    def __getitem__(self, y: int) -> Tile:
+        if y < 0:
+            y += self.board.height
+        if not 0 <= y < self.board.height:
+            raise IndexError("tile index out of range")
+        return Tile(self.board, self.x, int(y))
+
+    def __len__(self):
+        return self.board.height
+
+    def __iter__(self):
+        return (Tile(self.board, self.x, y) for y in range(self.board.height))
 
 
 class Result:
+    def __init__(self, player_id: str):
+        self.player_id = player_id
+        self.moves: List[MoveTypes] = []
+        self.touched_tiles: Set[Tuple[int, int]] = set()
+        self.touched_factions: Set[int] = set()
+        self.battles: List[Dict] = []
+        self.tiles: List[Dict] = []
+        self.factions: Dict[int, Tuple[float, float, float]] = {}
+        self.turn_queue: List[str] = []
+
+    def touch_tile(self, x: int, y: int):
+        self.touched_tiles.add((x, y))
+
+    def touch_faction(self, faction_id: int):
+        self.touched_factions.add(faction_id)
+
+    def finalize(self, game: "Game"):
+        board = game.board
+        self.tiles = [board.tile_record(x, y) for x, y in sorted(self.touched_tiles)]
+        self.factions = {
+            faction_id: board.factions[faction_id].resources.to_tuple()
+            for faction_id in sorted(self.touched_factions)
+        }
+        self.turn_queue = [player.id for player in game.turn_queue]
+
     def to_dict(self) -> dict:
-        pass
+        return {
+            "type": "move",
+            "details": {
+                "player_id": self.player_id,
+                "moves": list(self.moves),
+                "tiles": self.tiles,
+                "factions": {
+                    str(faction_id): list(resources)
+                    for faction_id, resources in self.factions.items()
+                },
+                "battles": self.battles,
+                "turn_queue": self.turn_queue,
+            },
+        }
 
 
 class Player:
-    def __init__(self, faction: Faction, name: str):
+    def __init__(
+        self,
+        faction: Faction,
+        name: str,
+        bot_type: Optional[BotType] = None,
+        player_id: Optional[str] = None,
+    ):
         self.faction = faction
-        self.id = f"player_{uuid.uuid4().hex[:8]}"
+        self.id = player_id or f"player_{uuid.uuid4().hex[:8]}"
         self.name = name
+        self.bot_type = bot_type
+
+    def fork(self, faction: Faction) -> "Player":
+        player = Player.__new__(Player)
+        player.faction = faction
+        player.id = self.id
+        player.name = self.name
+        player.bot_type = self.bot_type
+        return player
+
+
+def copy_generator(rng: np.random.Generator) -> np.random.Generator:
+    bit_generator = type(rng.bit_generator)()
+    bit_generator.state = rng.bit_generator.state
+    return np.random.Generator(bit_generator)
+
+
+class Checkpoint:
+    """Saves what a batch of moves can change so it can be put back in place.
+
+    Tiles are saved one at a time, just before a move touches them, and are
+    restored into the live arrays and building lists, so references to the
+    board, players and factions stay valid. A checkpoint restores only once.
+    """
+
+    def __init__(self, game: "Game"):
+        board = game.board
+        self.game = game
+        self.tiles: Dict[
+            Tuple[int, int], Tuple[List[np.ndarray], Optional[List["Building"]]]
+        ] = {}
+        self.factions = [(faction, faction.fork(board)) for faction in board.factions]
+        self.naval = board.naval.fork(board)
+        self.version = board.version
+        self.terrain_version = board.terrain_version
+        self.rng_state = game.rng.bit_generator.state
+        self.turn_queue = list(game.turn_queue)
+        self.turn_count = game.turn_count
+        self.round = game.round
+        self.move_count = len(game.move_log)
+
+    def save_tile(self, x: int, y: int):
+        if (x, y) in self.tiles:
+            return
+        board = self.game.board
+        buildings = board.buildings.get((x, y))
+        self.tiles[(x, y)] = (
+            [np.copy(getattr(board, name)[x, y]) for name in Board.state_arrays],
+            (
+                [building.fork(Tile(board, x, y)) for building in buildings]
+                if buildings is not None
+                else None
+            ),
+        )
+
+    def restore(self):
+        game = self.game
+        board = game.board
+        for (x, y), (values, buildings) in self.tiles.items():
+            for name, value in zip(Board.state_arrays, values):
+                getattr(board, name)[x, y] = value
+            if buildings is None:
+                board.buildings.pop((x, y), None)
+            else:
+                board.buildings[(x, y)] = buildings
+        del board.factions[len(self.factions) :]
+        for faction, saved in self.factions:
+            faction.__dict__.update(saved.__dict__)
+        board.naval = self.naval
+        if board.terrain_version != self.terrain_version:
+            board.terrain_version += 1
+        if board.version != self.version:
+            board.version += 1
+        game.rng.bit_generator.state = self.rng_state
+        game.turn_queue = self.turn_queue
+        game.turn_count = self.turn_count
+        game.round = self.round
+        del game.move_log[self.move_count :]
 
 
 class Game:
-    def __init__(self, board_size: int, ocean_width: int):
-        self.board = Board(board_size, board_size, ocean_width)
+    def __init__(self, board_size: int, ocean_width: int, seed: Optional[int] = None):
+        """Map generation and battles draw from separate PCG64 streams of the seed."""
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy)
+        board_stream, battle_stream = np.random.SeedSequence(self.seed).spawn(2)
+        self.rng = np.random.Generator(np.random.PCG64(battle_stream))
+        self.board = Board(
+            board_size,
+            board_size,
+            ocean_width,
+            np.random.Generator(np.random.PCG64(board_stream)),
+        )
         self.players: List[Player] = []
+        self.seats: List[Tuple[str, str, Corner, Optional[BotType]]] = []
+        self.move_log: List[List[MakeMove]] = []
         self.id = f"game_{uuid.uuid4().hex[:8]}"
         self.turn_queue: List[Player] = []
         self.started = False
-
-    def add_player(self, player_name: str, corner: Corner) -> str:
+        self.economy = Economy(self.board)
+        self.turn_count = 0
+        self.round = 0
+        self.timing_hook: Optional[Callable[[str, float], None]] = None
+        self.undo_state: Optional[Tuple[str, Checkpoint]] = None
+        self.state_version = 0
+
+    def add_player(
+        self,
+        player_name: str,
+        corner: Corner,
+        bot_type: Optional[BotType] = None,
+        player_id: Optional[str] = None,
+    ) -> str:
         faction = Faction(corner_colors[corner])
-        player = Player(faction, player_name)
+        player = Player(faction, player_name, bot_type, player_id)
         self.board.place_player(player, corner)
+        self.seats.append((player.id, player_name, corner, bot_type))
         self.players.append(player)
         self.turn_queue.append(player)
+        self.state_version += 1
         return player.id
 
     def get_player(self, player_id: str) -> Optional[Player]:
@@ -320,13 +834,141 @@ class Game:
     def start(self):
         self.board.place_environment()
         self.started = True
+        self.state_version += 1
 
     def make_move(self, move: MakeMove) -> Optional[Result]:
-        player = self.get_player(move.player_id)
-        if player:
-            if self.started and self.turn(player):
-                pass  # todo
-        return None
+        return self.apply_moves([move])
+
+    def apply_moves(self, moves: List[MakeMove]) -> Optional[Result]:
+        if not moves:
+            return None
+        player = self.get_player(moves[0].player_id)
+        if not (player and self.started and self.is_turn(player)):
+            return None
+        if any(move.player_id != player.id for move in moves):
+            return None
+        checkpoint = Checkpoint(self)
+        result = Result(player.id)
+        try:
+            for move in moves:
+                if not self.process_move(player, move, result, checkpoint):
+                    self.roll_back(checkpoint)
+                    return None
+        except Exception:
+            self.roll_back(checkpoint)
+            raise
+        self.advance_turn()
+        self.move_log.append(list(moves))
+        self.undo_state = (player.id, checkpoint)
+        start = time.perf_counter()
+        result.finalize(self)
+        self.record_timing("diff", start)
+        return result
+
+    def pass_turn(self, player_id: str) -> Optional[Result]:
+        player = self.get_player(player_id)
+        if not (player and self.started and self.is_turn(player)):
+            return None
+        self.advance_turn()
+        self.move_log.append([])
+        self.undo_state = None
+        result = Result(player.id)
+        result.finalize(self)
+        return result
+
+    def current_player(self) -> Optional[Player]:
+        return self.turn_queue[0] if self.turn_queue else None
+
+    def replay_record(self) -> Dict:
+        """Everything needed to rebuild this game: seed, seats and accepted turns."""
+        return {
+            "board_size": self.board.width,
+            "ocean_width": self.board.ocean_width,
+            "seed": self.seed,
+            "seats": list(self.seats),
+            "started": self.started,
+            "move_log": [list(moves) for moves in self.move_log],
+        }
+
+    @classmethod
+    def replay(cls, record: Dict) -> "Game":
+        game = cls(record["board_size"], record["ocean_width"], record["seed"])
+        for player_id, player_name, corner, bot_type in record["seats"]:
+            game.board.corner_occupations[corner] = True
+            game.add_player(player_name, corner, bot_type, player_id)
+        if record["started"]:
+            game.start()
+        for moves in record["move_log"]:
+            player = game.current_player()
+            if not (game.apply_moves(moves) if moves else game.pass_turn(player.id)):
+                raise ValueError(f"Move log diverged at turn {game.turn_count}")
+        return game
+
+    def fork(self) -> "Game":
+        game = copy.copy(self)
+        game.board = self.board.fork()
+        game.rng = copy_generator(self.rng)
+        game.seats = list(self.seats)
+        game.move_log = list(self.move_log)
+        factions = {
+            id(faction): forked
+            for faction, forked in zip(self.board.factions, game.board.factions)
+        }
+        players = {
+            player.id: player.fork(
+                factions.get(id(player.faction)) or player.faction.fork(game.board)
+            )
+            for player in self.players
+        }
+        game.players = [players[player.id] for player in self.players]
+        game.turn_queue = [players[player.id] for player in self.turn_queue]
+        game.economy = Economy(game.board)
+        game.undo_state = None
+        return game
+
+    def roll_back(self, checkpoint: Checkpoint):
+        checkpoint.restore()
+        self.state_version += 1
+
+    def undo(self, player_id: str) -> bool:
+        """Takes back the last turn while the next player has not moved yet."""
+        if self.undo_state is None:
+            return False
+        player_id_before, checkpoint = self.undo_state
+        if player_id_before != player_id:
+            return False
+        self.undo_state = None
+        self.roll_back(checkpoint)
+        return True
+
+    def process_move(
+        self,
+        player: Player,
+        request: MakeMove,
+        result: Result,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> bool:
+        start = time.perf_counter()
+        move = Move.parse(player, request)
+        start = self.record_timing("parse", start)
+        if move is None or not move.validate(self):
+            self.record_timing("validate", start)
+            return False
+        start = self.record_timing("validate", start)
+        if checkpoint is not None:
+            for coordinates in (move.first_tile, move.second_tile):
+                if coordinates is not None and self.board.in_bounds(*coordinates):
+                    checkpoint.save_tile(*coordinates)
+        move.apply(self, result)
+        result.moves.append(move.move_type)
+        self.record_timing("apply", start)
+        return True
+
+    def record_timing(self, stage: str, start: float) -> float:
+        now = time.perf_counter()
+        if self.timing_hook:
+            self.timing_hook(stage, now - start)
+        return now
 
     def get_empty_corner(self) -> Optional[Corner]:
         for corner, occupation in self.board.corner_occupations.items():
@@ -335,19 +977,361 @@ class Game:
                 return corner
         return None
 
+    def is_turn(self, player: Player) -> bool:
+        return bool(self.turn_queue) and self.turn_queue[0] == player
+
+    def advance_turn(self):
+        self.turn_queue = self.turn_queue[1:] + self.turn_queue[:1]
+        self.turn_count += 1
+        self.state_version += 1
+        if self.turn_count % len(self.turn_queue) == 0:
+            self.end_round()
+
     def turn(self, player: Player):
-        if self.turn_queue[0] == player:
-            self.turn_queue = self.turn_queue[1:] + self.turn_queue[:1]
+        if self.is_turn(player):
+            self.advance_turn()
             return True
         return False
 
+    def end_round(self):
+        self.economy.tick([player.faction for player in self.players])
+        self.round += 1
+
 
 class Round:
     pass
 
 
-class Move:
-    pass
+class Move(ABC):
+    move_type: MoveTypes
+    whole_amount = True
+
+    def __init__(self, player: Player, request: MakeMove):
+        self.player = player
+        self.faction = player.faction
+        self.first_tile = request.first_tile
+        self.second_tile = request.second_tile
+        self.amount = request.amount
+        if self.amount is not None:
+            if not (np.isfinite(self.amount) and abs(self.amount) <= MAX_MOVE_AMOUNT):
+                raise ValueError("Move amount is out of range")
+            if self.whole_amount and not float(self.amount).is_integer():
+                raise ValueError("Move amount must be a whole number")
+
+    @staticmethod
+    def parse(player: Player, request: MakeMove) -> Optional["Move"]:
+        move_class = MoveTables.move_classes.get(request.action_type)
+        if move_class is None:
+            return None
+        try:
+            return move_class(player, request)
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    @abstractmethod
+    def validate(self, game: "Game") -> bool:
+        pass
+
+    @abstractmethod
+    def apply(self, game: "Game", result: Result):
+        pass
+
+    def count(self) -> int:
+        return int(self.amount) if self.amount is not None else 1
+
+    def owns(self, game: "Game", coordinates: Tuple[int, int]) -> bool:
+        board = game.board
+        return board.in_bounds(*coordinates) and bool(
+            self.faction.territory and self.faction.territory.contains(*coordinates)
+        )
+
+    def can_afford(self, cost: ResourceBundle, count: int = 1) -> bool:
+        return bool((self.faction.resources.amounts >= cost.amounts * count).all())
+
+    def charge(
+        self, game: "Game", result: Result, cost: ResourceBundle, count: int = 1
+    ):
+        self.faction.resources.add_scaled(cost, -count)
+        result.touch_faction(game.board.register_faction(self.faction))
+
+
+class BuildMove(Move):
+    move_type = MoveTypes.BUILD
+
+    def __init__(self, player: Player, request: MakeMove):
+        super().__init__(player, request)
+        self.building_type = BuildingType(request.target)
+
+    def validate(self, game: "Game") -> bool:
+        board = game.board
+        x, y = self.first_tile
+        return (
+            self.owns(game, self.first_tile)
+            and self.faction.unlocked_buildings[self.building_type]
+            and len(board.buildings.get((x, y), ())) < TILE_BUILDING_CAPACITY
+            and (self.building_type != BuildingType.DOCK or board.is_shore(x, y))
+            and self.can_afford(MoveTables.building_costs[self.building_type])
+        )
+
+    def apply(self, game: "Game", result: Result):
+        x, y = self.first_tile
+        tile = game.board.tiles[x][y]
+        self.charge(game, result, MoveTables.building_costs[self.building_type])
+        tile.add_building(MoveTables.building_classes[self.building_type](tile))
+        result.touch_tile(x, y)
+
+
+class CreateMove(Move):
+    move_type = MoveTypes.CREATE
+
+    def __init__(self, player: Player, request: MakeMove):
+        super().__init__(player, request)
+        self.unit_type = MoveTables.unit_types[request.target]
+
+    def producer(self, game: "Game") -> Optional["Building"]:
+        x, y = self.first_tile
+        producer_type = MoveTables.unit_producers[self.unit_type]
+        for building in game.board.buildings.get((x, y), ()):
+            if building.building_type == producer_type:
+                if not isinstance(building, ResidentialBuilding):
+                    return building
+                if building.have_space(self.count()):
+                    return building
+        return None
+
+    def validate(self, game: "Game") -> bool:
+        return (
+            self.count() > 0
+            and self.owns(game, self.first_tile)
+            and self.can_afford(MoveTables.unit_costs[self.unit_type], self.count())
+            and self.producer(game) is not None
+        )
+
+    def apply(self, game: "Game", result: Result):
+        x, y = self.first_tile
+        producer = self.producer(game)
+        self.charge(game, result, MoveTables.unit_costs[self.unit_type], self.count())
+        if isinstance(producer, ResidentialBuilding):
+            producer.add_resident(Worker(), self.count())
+        else:
+            game.board.tiles[x][y].soldiers.add(self.unit_type, self.count())
+            game.board.army_changed(x, y, self.count())
+        result.touch_tile(x, y)
+
+
+class ModifyMove(Move):
+    move_type = MoveTypes.MODIFY
+
+    def __init__(self, player: Player, request: MakeMove):
+        super().__init__(player, request)
+        self.defensive_building = DefensiveBuildings(request.target)
+
+    def validate(self, game: "Game") -> bool:
+        x, y = self.first_tile
+        return (
+            self.owns(game, self.first_tile)
+            and (
+                self.defensive_building != DefensiveBuildings.TOWER
+                or game.board.tower_counts[x, y] < MAX_TOWER_PER_TILE
+            )
+            and self.can_afford(MoveTables.defensive_costs[self.defensive_building])
+        )
+
+    def apply(self, game: "Game", result: Result):
+        x, y = self.first_tile
+        tile = game.board.tiles[x][y]
+        self.charge(game, result, MoveTables.defensive_costs[self.defensive_building])
+        if self.defensive_building == DefensiveBuildings.WALLS:
+            tile.build_walls()
+        else:
+            tile.build_tower()
+        result.touch_tile(x, y)
+
+
+class TransferMove(Move):
+    move_type = MoveTypes.TRANSFER
+
+    def __init__(self, player: Player, request: MakeMove):
+        super().__init__(player, request)
+        self.building_type = BuildingType(request.target)
+        if self.second_tile is None:
+            raise ValueError("Transfer needs a destination tile")
+
+    def endpoints(
+        self, game: "Game"
+    ) -> Tuple[Optional["ResidentialBuilding"], Optional["ResidentialBuilding"]]:
+        board = game.board
+        destination = None
+        for building in board.buildings.get(self.second_tile, ()):
+            if building.building_type == self.building_type and isinstance(
+                building, ResidentialBuilding
+            ):
+                destination = building
+                break
+        if destination is None:
+            return None, None
+        for building in board.buildings.get(self.first_tile, ()):
+            if (
+                building is not destination
+                and isinstance(building, ResidentialBuilding)
+                and building.resident_type is Worker
+                and building.resident_type is destination.resident_type
+                and building.residents
+                and building.resident_count >= self.count()
+            ):
+                return building, destination
+        return None, destination
+
+    def validate(self, game: "Game") -> bool:
+        if not (
+            self.count() > 0
+            and self.owns(game, self.first_tile)
+            and self.owns(game, self.second_tile)
+            and max(
+                abs(self.first_tile[0] - self.second_tile[0]),
+                abs(self.first_tile[1] - self.second_tile[1]),
+            )
+            <= 1
+        ):
+            return False
+        source, destination = self.endpoints(game)
+        return source is not None and destination.have_space(self.count())
+
+    def apply(self, game: "Game", result: Result):
+        source, destination = self.endpoints(game)
+        remaining = self.count()
+        for signature, resident_count in list(source.residents.items()):
+            moved = min(remaining, resident_count)
+            unit = source.remove_resident(dict(signature), moved)
+            destination.add_resident(unit, moved)
+            remaining -= moved
+            if not remaining:
+                break
+        result.touch_tile(*self.first_tile)
+        result.touch_tile(*self.second_tile)
+
+
+class ArmyMove(Move):
+    move_type = MoveTypes.ARMY
+    whole_amount = False
+
+    def __init__(self, player: Player, request: MakeMove):
+        super().__init__(player, request)
+        self.fraction = float(self.amount) if self.amount is not None else 1.0
+        if self.second_tile is None:
+            raise ValueError("Army move needs a destination tile")
+
+    def sent_counts(self, game: "Game") -> np.ndarray:
+        return np.floor(game.board.army_counts[self.first_tile] * self.fraction).astype(
+            np.int32
+        )
+
+    def validate(self, game: "Game") -> bool:
+        board = game.board
+        if not (
+            0 < self.fraction <= 1
+            and self.first_tile != self.second_tile
+            and self.owns(game, self.first_tile)
+            and board.in_bounds(*self.second_tile)
+            and board.is_walkable(*self.second_tile)
+            and self.sent_counts(game).any()
+        ):
+            return False
+        cost = board.pathfinder.path_cost(
+            board.register_faction(self.faction), self.first_tile, self.second_tile
+        )
+        return cost is not None and cost <= ARMY_MOVE_BUDGET
+
+    def apply(self, game: "Game", result: Result):
+        board = game.board
+        source = board.tiles[self.first_tile[0]][self.first_tile[1]]
+        target = board.tiles[self.second_tile[0]][self.second_tile[1]]
+        army = source.soldiers.split(self.sent_counts(game))
+        board.army_changed(source.x, source.y, -len(army))
+        result.touch_tile(source.x, source.y)
+        result.touch_tile(target.x, target.y)
+        if self.faction.controls(target):
+            board.army_changed(target.x, target.y, len(army))
+            target.soldiers.merge(army)
+            return
+
+        war = War(
+            army, target.soldiers, target.tower_count, target.wall_count, game.rng
+        )
+        attacker_damage, defender_damage, wall_damage, tile_damage = war.result()
+        attacker_damage, defender_damage, tile_damage = (
+            float(np.clip(np.nan_to_num(damage, nan=0.0), 0.0, 1.0))
+            for damage in (attacker_damage, defender_damage, tile_damage)
+        )
+        wall_damage = max(0.0, float(np.nan_to_num(wall_damage, nan=0.0)))
+        result.battles.append(
+            {
+                "x": target.x,
+                "y": target.y,
+                "attacker_damage": attacker_damage,
+                "defender_damage": defender_damage,
+                "wall_damage": wall_damage,
+                "tile_damage": tile_damage,
+            }
+        )
+        defender_losses = len(target.soldiers)
+        army.counts[:] = np.maximum(
+            army.counts - np.rint(army.counts * attacker_damage), 0
+        ).astype(np.int32)
+        target.soldiers.counts[:] = np.maximum(
+            target.soldiers.counts - np.rint(target.soldiers.counts * defender_damage),
+            0,
+        ).astype(np.int32)
+        target.soldiers.clamp_status()
+        board.army_changed(target.x, target.y, len(target.soldiers) - defender_losses)
+        target.wall_count = max(0.0, target.wall_count - wall_damage)
+        target.hp = max(0.0, target.hp - tile_damage * target.max_hp)
+
+        if target.faction:
+            result.touch_faction(board.register_faction(target.faction))
+        if army and not target.soldiers and target.hp <= 0:
+            self.faction.add_resources(target.treasure)
+            target.treasure = ResourceBundle()
+            result.touch_faction(board.register_faction(self.faction))
+            target.change_faction(self.faction)
+            target.soldiers.merge(army)
+            board.army_changed(target.x, target.y, len(target.soldiers))
+        elif army:
+            board.army_changed(source.x, source.y, len(army))
+            source.soldiers.merge(army)
+
+
+class BattlePrediction:
+    percentiles = (5, 25, 50, 75, 95)
+    fields = ("attacker_damage", "defender_damage", "wall_damage", "tile_damage")
+
+    def __init__(
+        self,
+        samples: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+        win_probability: float,
+        exact: bool,
+    ):
+        self.sample_count = len(samples[0])
+        self.means = {
+            field: float(values.mean()) for field, values in zip(self.fields, samples)
+        }
+        self.quantiles = {
+            field: dict(
+                zip(self.percentiles, np.percentile(values, self.percentiles).tolist())
+            )
+            for field, values in zip(self.fields, samples)
+        }
+        self.win_probability = win_probability
+        self.exact = exact
+
+    def to_dict(self) -> dict:
+        return {
+            "sample_count": self.sample_count,
+            "means": self.means,
+            "percentiles": self.quantiles,
+            "win_probability": self.win_probability,
+            "exact": self.exact,
+        }
 
 
 class War:
@@ -417,118 +1401,533 @@ class War:
         },
     }
 
+    counter_array: np.ndarray
+
     def __init__(
         self,
-        army_1: List[Soldier],
-        army_2: List[Soldier],
-        towers: int = 0,
-        walls: int = 0,
+        army_1: Army,
+        army_2: Army,
+        towers: int,
+        walls: int,
+        rng: np.random.Generator,
     ):
         """Army 1 is the attacker, Army 2 is the defender. Towers and walls belong to Army 2."""
         self.army_1 = army_1
         self.army_2 = army_2
         self.towers = towers
         self.walls = walls
+        self.rng = rng
+
+    @classmethod
+    def compile_counter_matrix(cls):
+        War.invalidate_power_cache()
+        cls.counter_array = np.array(
+            [
+                [
+                    cls.counter_matrix[soldier_type_1][soldier_type_2]
+                    for soldier_type_2 in soldier_type_order
+                ]
+                for soldier_type_1 in soldier_type_order
+            ]
+        )
+
+    @staticmethod
+    def group_soldier_types(army: Army, towers: int) -> np.ndarray:
+        return War.group_batch(army.counts[np.newaxis], np.array([towers]))[0]
 
     @staticmethod
-    def group_soldier_types(army: List[Soldier], towers: int):
-        groups: Dict[InfantryUnitType | CavalryUnitType | SiegeUnitType, int] = (
-            defaultdict(int)
+    def group_batch(armies: np.ndarray, towers: np.ndarray) -> np.ndarray:
+        groups = armies.astype(float)
+        groups[:, soldier_indices[InfantryUnitType.ARCHER]] += (
+            towers * ARCHERY_POWER_PER_TOWER
         )
-        for soldier in army:
-            groups[soldier.soldier_type] += 1
-        groups[InfantryUnitType.ARCHER] += towers * ARCHERY_POWER_PER_TOWER
         return groups
 
     @staticmethod
-    def get_army_composition(
-        army: List[Soldier], towers: int
-    ) -> Dict[InfantryUnitType | CavalryUnitType | SiegeUnitType, float]:
-        grouped_army = War.group_soldier_types(army, towers)
-        composition = {
-            soldier_type: soldier_count / len(army)
-            for soldier_type, soldier_count in grouped_army.items()
-        }
-        return composition
+    def get_army_composition(army: Army, towers: int) -> np.ndarray:
+        return War.group_soldier_types(army, towers) / len(army)
+
+    def get_luck_factors(self) -> Tuple[float, float]:
+        army_1_luck, army_2_luck = War.draw_luck_factors(1, self.rng)[0]
+        return float(army_1_luck), float(army_2_luck)
+
+    @staticmethod
+    def draw_luck_factors(count: int, rng: np.random.Generator) -> np.ndarray:
+        return rng.uniform(1 - LUCK_FACTOR, 1 + LUCK_FACTOR, (count, 2))
+
+    @staticmethod
+    def power_factors_batch(
+        attackers: np.ndarray, defenders: np.ndarray, towers: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """A tile with towers but no soldiers is defended by the tower archers alone."""
+        grouped_defenders = War.group_batch(defenders, towers)
+        attacker_sizes = attackers.sum(axis=1)
+        defender_sizes = defenders.sum(axis=1)
+        defender_sizes = np.where(
+            defender_sizes > 0, defender_sizes, grouped_defenders.sum(axis=1)
+        )
+        attacker_comp = np.divide(
+            attackers,
+            attacker_sizes[:, np.newaxis],
+            out=np.zeros(attackers.shape),
+            where=attacker_sizes[:, np.newaxis] > 0,
+        )
+        defender_comp = np.divide(
+            grouped_defenders,
+            defender_sizes[:, np.newaxis],
+            out=np.zeros(grouped_defenders.shape),
+            where=defender_sizes[:, np.newaxis] > 0,
+        )
+        attacker_factors = np.einsum(
+            "ni,ij,nj->n", attacker_comp, War.counter_array, defender_comp
+        )
+        defender_factors = np.einsum(
+            "ni,ji,nj->n", attacker_comp, War.counter_array, defender_comp
+        )
+        return attacker_factors, defender_factors, attacker_sizes, defender_sizes
+
+    @staticmethod
+    def total_powers_batch(
+        attackers: np.ndarray, defenders: np.ndarray, towers: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        attacker_factors, defender_factors, attacker_sizes, defender_sizes = (
+            War.power_factors_batch(attackers, defenders, towers)
+        )
+        return attacker_factors * attacker_sizes, defender_factors * defender_sizes
+
+    @staticmethod
+    def damage_rates_batch(
+        attacker_powers: np.ndarray,
+        defender_powers: np.ndarray,
+        luck_factors: np.ndarray,
+        attacker_sizes: np.ndarray,
+        defender_sizes: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        attacker_net_powers = attacker_powers * luck_factors[..., 0]
+        defender_net_powers = defender_powers * luck_factors[..., 1]
+        total_powers = attacker_net_powers + defender_net_powers
+        with np.errstate(divide="ignore", invalid="ignore"):
+            attacker_damages = np.where(
+                total_powers > 0,
+                defender_net_powers / total_powers,
+                attacker_sizes == 0,
+            )
+            defender_damages = np.where(
+                total_powers > 0,
+                attacker_net_powers / total_powers,
+                defender_sizes == 0,
+            )
+        attacker_damages = np.where(
+            attacker_damages >= ROUT_DAMAGE_RATE, 1.0, attacker_damages
+        )
+        defender_damages = np.where(
+            defender_damages >= ROUT_DAMAGE_RATE, 1.0, defender_damages
+        )
+        return attacker_damages, defender_damages
+
+    @staticmethod
+    def resolve_batch(
+        attackers: np.ndarray,
+        defenders: np.ndarray,
+        towers: np.ndarray,
+        walls: np.ndarray,
+        rng: np.random.Generator,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Resolves one battle per row of the (N, 7) attacker and defender count arrays."""
+        attacker_factors, defender_factors, attacker_sizes, defender_sizes = (
+            War.power_factors_batch(attackers, defenders, towers)
+        )
+        attacker_damages, defender_damages = War.damage_rates_batch(
+            attacker_factors * attacker_sizes,
+            defender_factors * defender_sizes,
+            War.draw_luck_factors(len(attackers), rng),
+            attacker_sizes,
+            defender_sizes,
+        )
+        wall_damages = War.calculate_wall_damage(
+            defender_damages, attackers[:, soldier_indices[SiegeUnitType.CANNON]]
+        )
+        defender_tile_damages = attacker_damages * Tile.get_wall_damage_modifier(
+            walls - wall_damages
+        )
+        return attacker_damages, defender_damages, wall_damages, defender_tile_damages
+
+    def batch_row(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            self.army_1.counts[np.newaxis],
+            self.army_2.counts[np.newaxis],
+            np.array([self.towers]),
+            np.array([self.walls]),
+        )
+
+    def power_signature(self) -> Tuple[Tuple[int, ...], Tuple[int, ...], int]:
+        return (
+            tuple(self.army_1.counts.tolist()),
+            tuple(self.army_2.counts.tolist()),
+            int(self.towers),
+        )
 
     @staticmethod
-    def get_luck_factors() -> Tuple[float, float]:
+    @lru_cache(maxsize=POWER_CACHE_SIZE)
+    def cached_powers(
+        attacker_counts: Tuple[int, ...], defender_counts: Tuple[int, ...], towers: int
+    ) -> Tuple[float, float, float, float]:
+        attacker_factors, defender_factors, attacker_sizes, defender_sizes = (
+            War.power_factors_batch(
+                np.array([attacker_counts]),
+                np.array([defender_counts]),
+                np.array([towers]),
+            )
+        )
         return (
-            random.uniform(1 - LUCK_FACTOR, 1 + LUCK_FACTOR),
-            random.uniform(1 - LUCK_FACTOR, 1 + LUCK_FACTOR),
+            float(attacker_factors[0]),
+            float(defender_factors[0]),
+            float(attacker_factors[0] * attacker_sizes[0]),
+            float(defender_factors[0] * defender_sizes[0]),
         )
 
+    @staticmethod
+    def invalidate_power_cache():
+        War.cached_powers.cache_clear()
+
+    @staticmethod
+    def power_cache_info():
+        return War.cached_powers.cache_info()
+
     def get_power_factors(self) -> Tuple[float, float]:
-        army_1_comp = War.get_army_composition(self.army_1, 0)
-        army_2_comp = War.get_army_composition(self.army_2, self.towers)
-        army_1_power_factor = 0.0
-        army_2_power_factor = 0.0
-        for soldier_type_1, soldier_ratio_1 in army_1_comp.items():
-            for soldier_type_2, soldier_ratio_2 in army_2_comp.items():
-                army_1_power_factor += (
-                    soldier_ratio_1
-                    * soldier_ratio_2
-                    * War.counter_matrix[soldier_type_1][soldier_type_2]
-                )
-                army_2_power_factor += (
-                    soldier_ratio_1
-                    * soldier_ratio_2
-                    * War.counter_matrix[soldier_type_2][soldier_type_1]
-                )
+        army_1_power_factor, army_2_power_factor, _, _ = War.cached_powers(
+            *self.power_signature()
+        )
         return army_1_power_factor, army_2_power_factor
 
-    def get_total_powers(self):
-        army_1_power_factor, army_2_power_factor = self.get_power_factors()
-        army_1_total_power = army_1_power_factor * len(self.army_1)
-        army_2_total_power = army_2_power_factor * len(self.army_2)
+    def get_total_powers(self) -> Tuple[float, float]:
+        _, _, army_1_total_power, army_2_total_power = War.cached_powers(
+            *self.power_signature()
+        )
         return army_1_total_power, army_2_total_power
 
     def final_damage_rates(self) -> Tuple[float, float]:
-        army_1_total_power, army_2_total_power = self.get_total_powers()
-        army_1_luck, army_2_luck = War.get_luck_factors()
-        army_1_net_power = army_1_total_power * army_1_luck
-        army_2_net_power = army_2_total_power * army_2_luck
-        total_powers = army_1_net_power + army_2_net_power
-        army_1_damage, army_2_damage = (
-            army_2_net_power / total_powers,
-            army_1_net_power / total_powers,
+        army_1_damage, army_2_damage, _, _ = self.outcomes(
+            War.draw_luck_factors(1, self.rng)
         )
-        if army_1_damage >= 0.75:
-            army_1_damage = 1.0
+        return float(army_1_damage[0]), float(army_2_damage[0])
 
-        if army_2_damage >= 0.75:
-            army_2_damage = 1.0
-
-        return army_1_damage, army_2_damage
+    def outcomes(
+        self, luck_factors: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        army_1_total_power, army_2_total_power = self.get_total_powers()
+        attacker_damages, defender_damages = War.damage_rates_batch(
+            np.array([army_1_total_power]),
+            np.array([army_2_total_power]),
+            luck_factors,
+            np.array([len(self.army_1)]),
+            np.array([len(self.army_2)]),
+        )
+        wall_damages = War.calculate_wall_damage(
+            defender_damages, self.army_1.count(SiegeUnitType.CANNON)
+        )
+        defender_tile_damages = attacker_damages * Tile.get_wall_damage_modifier(
+            self.walls - wall_damages
+        )
+        return attacker_damages, defender_damages, wall_damages, defender_tile_damages
 
     @staticmethod
-    def calculate_wall_damage(defender_damage: float, cannons: int):
-        defender_damage = 0 if defender_damage <= 0.25 else defender_damage
+    def calculate_wall_damage(defender_damage, cannons):
+        defender_damage = np.where(defender_damage <= 0.25, 0, defender_damage)
         return defender_damage * cannons * CANNON_DAMAGE_TO_WALL
 
-    def result(self):
-        damage_1, damage_2 = self.final_damage_rates()
-        attacker_cannons = sum(
-            [
-                1
-                for soldier in self.army_1
-                if soldier.soldier_type == SiegeUnitType.CANNON
-            ]
+    @staticmethod
+    def rout_probability(winner_power: float, loser_power: float) -> float:
+        """Exact probability that the loser's damage rate reaches the rout threshold."""
+        if winner_power <= 0:
+            return 0.0
+        if loser_power <= 0 or LUCK_FACTOR == 0:
+            return float(
+                winner_power / (winner_power + loser_power) >= ROUT_DAMAGE_RATE
+            )
+        low, high = 1 - LUCK_FACTOR, 1 + LUCK_FACTOR
+        ratio = ROUT_DAMAGE_RATE * loser_power / ((1 - ROUT_DAMAGE_RATE) * winner_power)
+        full_until = min(max(low / ratio, low), high)
+        partial_until = min(max(high / ratio, low), high)
+        full_area = (full_until - low) * (high - low)
+        partial_area = high * (partial_until - full_until) - ratio / 2 * (
+            partial_until**2 - full_until**2
         )
-        wall_damage = War.calculate_wall_damage(damage_2, attacker_cannons)
-        remaining_walls = self.walls - wall_damage
-        defender_tile_damage = damage_1 * Tile.get_wall_damage_modifier(remaining_walls)
-        return damage_1, damage_2, wall_damage, defender_tile_damage
+        return float((full_area + partial_area) / (high - low) ** 2)
+
+    def predict(
+        self, n_samples: int = 1000, rng: Optional[np.random.Generator] = None
+    ) -> BattlePrediction:
+        attacker_power, defender_power = self.get_total_powers()
+        exact = LUCK_FACTOR == 0 or not (attacker_power > 0 and defender_power > 0)
+        luck_factors = (
+            np.ones((1, 2))
+            if exact
+            else War.draw_luck_factors(n_samples, rng if rng is not None else self.rng)
+        )
+        if defender_power <= 0:
+            win_probability = float(bool(self.army_1))
+        else:
+            win_probability = War.rout_probability(attacker_power, defender_power)
+        return BattlePrediction(self.outcomes(luck_factors), win_probability, exact)
+
+    def result(self) -> Tuple[float, float, float, float]:
+        damage_1, damage_2, wall_damage, defender_tile_damage = self.outcomes(
+            War.draw_luck_factors(1, self.rng)
+        )
+        return (
+            float(damage_1[0]),
+            float(damage_2[0]),
+            float(wall_damage[0]),
+            float(defender_tile_damage[0]),
+        )
+
+
+War.compile_counter_matrix()
+
+
+class Territory:
+    """Owned tiles of a faction with union-find components and running totals."""
+
+    def __init__(
+        self, board: "Board", faction_id: int, capital: Optional[Tuple[int, int]]
+    ):
+        self.board = board
+        self.faction_id = faction_id
+        self.capital = capital
+        self.mask = np.zeros((board.width, board.height), dtype=bool)
+        self.members: Set[int] = set()
+        self.parents: Dict[int, int] = {}
+        self.component_sizes: Dict[int, int] = {}
+        self.dirty = False
+        self.tile_count = 0
+        self.building_count = 0
+        self.army_size = 0
+
+    def fork(self, board: "Board") -> "Territory":
+        territory = copy.copy(self)
+        territory.board = board
+        territory.mask = self.mask.copy()
+        territory.members = set(self.members)
+        territory.parents = dict(self.parents)
+        territory.component_sizes = dict(self.component_sizes)
+        return territory
+
+    def contains(self, x: int, y: int) -> bool:
+        return bool(self.mask[x, y])
+
+    def get_tiles(self) -> List["Tile"]:
+        height = self.board.height
+        return [
+            self.board.tiles[index // height][index % height]
+            for index in sorted(self.members)
+        ]
+
+    def find(self, index: int) -> int:
+        parents = self.parents
+        root = index
+        while parents[root] != root:
+            root = parents[root]
+        while parents[index] != root:
+            parents[index], index = root, parents[index]
+        return root
+
+    def union(self, index_1: int, index_2: int):
+        root_1, root_2 = self.find(index_1), self.find(index_2)
+        if root_1 == root_2:
+            return
+        if self.component_sizes[root_1] < self.component_sizes[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.parents[root_2] = root_1
+        self.component_sizes[root_1] += self.component_sizes.pop(root_2)
+
+    def link(self, index: int):
+        self.parents[index] = index
+        self.component_sizes[index] = 1
+        for neighbor in self.board.neighbor_table.reshape(
+            -1, len(Board.neighbor_offsets)
+        )[index]:
+            if neighbor >= 0 and neighbor in self.parents:
+                self.union(index, int(neighbor))
+
+    def rebuild(self):
+        self.parents = {}
+        self.component_sizes = {}
+        for index in self.members:
+            self.link(index)
+        self.dirty = False
+
+    def add(self, tile: "Tile"):
+        index = tile.x * self.board.height + tile.y
+        if index in self.members:
+            return
+        self.members.add(index)
+        self.mask[tile.x, tile.y] = True
+        self.tile_count += 1
+        self.building_count += len(self.board.buildings.get((tile.x, tile.y), ()))
+        self.army_size += int(self.board.army_counts[tile.x, tile.y].sum())
+        if not self.dirty:
+            self.link(index)
+
+    def remove(self, tile: "Tile"):
+        index = tile.x * self.board.height + tile.y
+        if index not in self.members:
+            return
+        self.members.discard(index)
+        self.mask[tile.x, tile.y] = False
+        self.tile_count -= 1
+        self.building_count -= len(self.board.buildings.get((tile.x, tile.y), ()))
+        self.army_size -= int(self.board.army_counts[tile.x, tile.y].sum())
+        self.dirty = True
+
+    def component_count(self) -> int:
+        if self.dirty:
+            self.rebuild()
+        return len(self.component_sizes)
+
+    def connected(self, tile_1: Tuple[int, int], tile_2: Tuple[int, int]) -> bool:
+        if self.dirty:
+            self.rebuild()
+        index_1 = tile_1[0] * self.board.height + tile_1[1]
+        index_2 = tile_2[0] * self.board.height + tile_2[1]
+        if index_1 not in self.parents or index_2 not in self.parents:
+            return False
+        return self.find(index_1) == self.find(index_2)
+
+    def connected_to_capital(self, x: int, y: int) -> bool:
+        return self.capital is not None and self.connected(self.capital, (x, y))
+
+    def capital_component_size(self) -> int:
+        if self.capital is None or not self.contains(*self.capital):
+            return 0
+        if self.dirty:
+            self.rebuild()
+        capital_index = self.capital[0] * self.board.height + self.capital[1]
+        return self.component_sizes[self.find(capital_index)]
+
+
+class DistanceField:
+    unreachable = -1
+
+    def __init__(self, board: "Board", faction_id: int, capital: Tuple[int, int]):
+        self.board = board
+        self.faction_id = faction_id
+        self.capital = capital
+        capital_x, capital_y = capital
+        xs = np.arange(board.width)[:, np.newaxis]
+        ys = np.arange(board.height)[np.newaxis, :]
+        self.chebyshev = np.maximum(np.abs(xs - capital_x), np.abs(ys - capital_y))
+        self.walkable = np.full(
+            (board.width, board.height), DistanceField.unreachable, dtype=np.int32
+        )
+        self.dirty = True
+
+    def fork(self, board: "Board") -> "DistanceField":
+        """The Chebyshev field never changes, so only walking distances are copied."""
+        distance_field = copy.copy(self)
+        distance_field.board = board
+        distance_field.walkable = self.walkable.copy()
+        return distance_field
+
+    def rebuild(self):
+        self.walkable.fill(DistanceField.unreachable)
+        capital_x, capital_y = self.capital
+        if self.board.faction_ids[capital_x, capital_y] == self.faction_id:
+            self.walkable[capital_x, capital_y] = 0
+            self.relax(capital_x, capital_y)
+        self.dirty = False
+
+    def relax(self, x: int, y: int):
+        """Propagates shorter distances outward from (x, y) through owned tiles."""
+        board = self.board
+        distances = self.walkable.reshape(-1)
+        owners = board.faction_ids.reshape(-1)
+        blocked = (board.ocean_mask | board.obstacle_mask).reshape(-1)
+        neighbor_table = board.neighbor_table.reshape(-1, len(Board.neighbor_offsets))
+        queue = deque([x * board.height + y])
+        while queue:
+            index = queue.popleft()
+            next_distance = distances[index] + 1
+            for neighbor in neighbor_table[index]:
+                if neighbor < 0 or blocked[neighbor]:
+                    continue
+                distance = distances[neighbor]
+                if distance == DistanceField.unreachable or next_distance < distance:
+                    distances[neighbor] = next_distance
+                    if owners[neighbor] == self.faction_id:
+                        queue.append(neighbor)
+
+    def tile_gained(self, x: int, y: int):
+        if not self.dirty and self.walkable[x, y] != DistanceField.unreachable:
+            self.relax(x, y)
+
+    def tile_lost(self, x: int, y: int):
+        self.dirty = True
+
+    def walking_distance(self, x: int, y: int) -> Optional[int]:
+        """Steps from the capital through owned land, plus one step past the border."""
+        if self.dirty:
+            self.rebuild()
+        distance = int(self.walkable[x, y])
+        return distance if distance != DistanceField.unreachable else None
 
 
 class Board:
-    def __init__(self, width: int, height: int, ocean_width: int):
+    neighbor_offsets = np.array(
+        [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+    )
+    state_arrays = (
+        "tile_types",
+        "max_hp",
+        "hp",
+        "faction_ids",
+        "wall_counts",
+        "tower_counts",
+        "treasures",
+        "army_counts",
+        "army_status",
+        "resident_epochs",
+        "obstacle_mask",
+    )
+    spatial_index_fields = (
+        "ocean_mask",
+        "shore_mask",
+        "corner_mask",
+        "neighbor_table",
+        "neighbor_counts",
+    )
+    spatial_indexes: OrderedDict[
+        Tuple[int, int, int], Tuple[Dict[str, np.ndarray], NavalGraph]
+    ] = OrderedDict()
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        ocean_width: int,
+        rng: Optional[np.random.Generator] = None,
+    ):
         self.width = width
         self.height = height
         self.ocean_width = ocean_width
-        self.tiles: List[List[Tile]] = [
-            [Tile(x, y) for y in range(height)] for x in range(width)
-        ]
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.tile_types = np.full((width, height), -1, dtype=np.int8)
+        self.max_hp = np.zeros((width, height))
+        self.hp = np.zeros((width, height))
+        self.faction_ids = np.full((width, height), -1, dtype=np.int16)
+        self.wall_counts = np.zeros((width, height))
+        self.tower_counts = np.zeros((width, height), dtype=np.int16)
+        self.treasures = np.zeros((width, height, len(resource_type_order)))
+        self.buildings: Dict[Tuple[int, int], List[Building]] = {}
+        self.army_counts = np.zeros(
+            (width, height, len(soldier_type_order)), dtype=np.int32
+        )
+        self.army_status = np.zeros((width, height, 2), dtype=np.int32)
+        self.resident_epochs = np.zeros((width, height), dtype=np.int32)
+        self.factions: List[Faction] = []
+        self.version = 0
+        self.terrain_version = 0
+        self.tiles: List[TileColumn] = [TileColumn(self, x) for x in range(width)]
         self.corner_occupations = {
             Corner.TOP_LEFT: False,
             Corner.BOTTOM_RIGHT: False,
@@ -541,34 +1940,154 @@ class Board:
             Corner.TOP_RIGHT: (width - 1, 0),
             Corner.BOTTOM_LEFT: (0, height - 1),
         }
+        self.obstacle_mask = np.zeros((width, height), dtype=bool)
+        self.load_spatial_index()
+        self.pathfinder = Pathfinder(self)
+
+    def fork(self) -> "Board":
+        """Copy of the board that shares the static spatial index with this one.
+
+        Per-tile state lives in a handful of contiguous arrays that are copied
+        wholesale, while Python-side state (buildings, factions, docks) is only
+        copied where something exists, so forks stay cheap on large boards.
+        """
+        board = copy.copy(self)
+        for name in Board.state_arrays:
+            setattr(board, name, getattr(self, name).copy())
+        board.rng = copy_generator(self.rng)
+        board.tiles = [TileColumn(board, x) for x in range(self.width)]
+        board.corner_occupations = dict(self.corner_occupations)
+        board.factions = [faction.fork(board) for faction in self.factions]
+        board.buildings = {
+            (x, y): [building.fork(Tile(board, x, y)) for building in buildings]
+            for (x, y), buildings in self.buildings.items()
+        }
+        board.naval = self.naval.fork(board)
+        board.pathfinder = self.pathfinder.fork(board)
+        return board
+
+    def load_spatial_index(self):
+        """The static index only depends on the dimensions, so boards share it.
+
+        Only the most recently used dimensions are kept; boards that already
+        loaded an evicted index keep their own references to it.
+        """
+        key = (self.width, self.height, self.ocean_width)
+        if key in Board.spatial_indexes:
+            Board.spatial_indexes.move_to_end(key)
+        else:
+            self.build_spatial_index()
+            fields = {name: getattr(self, name) for name in Board.spatial_index_fields}
+            for array in fields.values():
+                array.flags.writeable = False
+            Board.spatial_indexes[key] = (fields, NavalGraph(self).fork(None))
+            if len(Board.spatial_indexes) > SPATIAL_INDEX_CACHE_SIZE:
+                Board.spatial_indexes.popitem(last=False)
+        fields, naval = Board.spatial_indexes[key]
+        self.__dict__.update(fields)
+        self.naval = naval.fork(self)
+
+    def build_spatial_index(self):
+        xs = np.arange(self.width)[:, np.newaxis]
+        ys = np.arange(self.height)[np.newaxis, :]
+        vertical_center = ((self.height + 1) / 2) - 1
+        horizontal_center = ((self.width + 1) / 2) - 1
+        self.ocean_mask = (np.abs(xs - horizontal_center) < self.ocean_width / 2) | (
+            np.abs(ys - vertical_center) < self.ocean_width / 2
+        )
+        self.shore_mask = self.dilate(self.ocean_mask) & ~self.ocean_mask
+
+        corner_distances = np.full((self.width, self.height), np.iinfo(np.int64).max)
+        for corner_x, corner_y in self.corner_coordinates.values():
+            corner_distances = np.minimum(
+                corner_distances,
+                np.maximum(np.abs(xs - corner_x), np.abs(ys - corner_y)),
+            )
+        self.corner_mask = corner_distances <= 1
+
+        neighbor_xs = xs[..., np.newaxis] + Board.neighbor_offsets[:, 0]
+        neighbor_ys = ys[..., np.newaxis] + Board.neighbor_offsets[:, 1]
+        valid = (
+            (neighbor_xs >= 0)
+            & (neighbor_xs < self.width)
+            & (neighbor_ys >= 0)
+            & (neighbor_ys < self.height)
+        )
+        self.neighbor_table: np.ndarray = np.where(
+            valid, neighbor_xs * self.height + neighbor_ys, -1
+        )
+        self.neighbor_counts: np.ndarray = valid.sum(axis=2)
+
+    def register_faction(self, faction: Optional[Faction]) -> int:
+        if faction is None:
+            return -1
+        for faction_id, registered_faction in enumerate(self.factions):
+            if registered_faction is faction:
+                return faction_id
+        self.factions.append(faction)
+        return len(self.factions) - 1
+
+    def get_faction(self, faction_id: int) -> Optional[Faction]:
+        return self.factions[faction_id] if faction_id >= 0 else None
+
+    def get_territory(self, x: int, y: int) -> Optional["Territory"]:
+        faction = self.get_faction(self.faction_ids[x, y])
+        if faction and faction.territory and faction.territory.contains(x, y):
+            return faction.territory
+        return None
+
+    def buildings_changed(self, x: int, y: int, delta: int):
+        if territory := self.get_territory(x, y):
+            territory.building_count += delta
+
+    def army_changed(self, x: int, y: int, delta: int):
+        if territory := self.get_territory(x, y):
+            territory.army_size += delta
+
+    def dilate(self, mask: np.ndarray) -> np.ndarray:
+        padded = np.pad(mask, 1)
+        dilated = np.zeros_like(mask)
+        for dx in range(3):
+            for dy in range(3):
+                dilated |= padded[dx : dx + self.width, dy : dy + self.height]
+        return dilated
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_ocean(self, x: int, y: int) -> bool:
+        return bool(self.ocean_mask[x, y])
+
+    def is_shore(self, x: int, y: int) -> bool:
+        return bool(self.shore_mask[x, y])
+
+    def is_obstacle(self, x: int, y: int) -> bool:
+        return bool(self.obstacle_mask[x, y])
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        return not (self.ocean_mask[x, y] or self.obstacle_mask[x, y])
+
+    def get_neighbor_coordinates(self, x: int, y: int) -> List[Tuple[int, int]]:
+        return [
+            divmod(int(index), self.height)
+            for index in self.neighbor_table[x, y]
+            if index >= 0
+        ]
+
+    def get_neighbors(self, x: int, y: int) -> List[Tile]:
+        return [
+            self.tiles[neighbor_x][neighbor_y]
+            for neighbor_x, neighbor_y in self.get_neighbor_coordinates(x, y)
+        ]
 
     def get_flattened_tiles(self):
         return [self.tiles[x][y] for y in range(self.height) for x in range(self.width)]
 
     def get_ocean_tiles(self) -> List[Tile]:
-        vertical_center = ((self.height + 1) / 2) - 1
-        horizontal_center = ((self.width + 1) / 2) - 1
-        ocean_tiles = []
-        for x in range(self.width):
-            for y in range(self.height):
-                if (
-                    abs(x - horizontal_center) < self.ocean_width / 2
-                    or abs(y - vertical_center) < self.ocean_width / 2
-                ):
-                    ocean_tiles.append(self.tiles[x][y])
-        return ocean_tiles
+        return [self.tiles[x][y] for x, y in np.argwhere(self.ocean_mask)]
 
     def get_shore_tiles(self) -> List[Tile]:
-        shore_tiles = []
-        for tile in self.get_flattened_tiles():
-            shore = False
-            for ocean_tile in self.get_ocean_tiles():
-                if Board.get_relative_distance(tile, ocean_tile) == 1:
-                    shore = True
-                    break
-            if shore:
-                shore_tiles.append(tile)
-        return [tile for tile in shore_tiles if tile not in self.get_ocean_tiles()]
+        return [self.tiles[x][y] for y, x in np.argwhere(self.shore_mask.T)]
 
     @staticmethod
     def get_relative_distance(tile_1: Tile, tile_2: Tile) -> int:
@@ -576,57 +2095,72 @@ class Board:
         y_diff = abs(tile_1.y - tile_2.y)
         return max(x_diff, y_diff)
 
+    def tile_record(self, x: int, y: int) -> Dict:
+        faction = self.get_faction(int(self.faction_ids[x, y]))
+        return {
+            "x": x,
+            "y": y,
+            "faction": faction.color if faction else None,
+            "hp": float(self.hp[x, y]),
+            "walls": float(self.wall_counts[x, y]),
+            "towers": int(self.tower_counts[x, y]),
+            "buildings": [
+                building.building_type for building in self.buildings.get((x, y), ())
+            ],
+            "soldiers": {
+                str(soldier_type): int(count)
+                for soldier_type, count in zip(
+                    soldier_type_order, self.army_counts[x, y]
+                )
+                if count
+            },
+            "treasure": self.treasures[x, y].tolist(),
+        }
+
     def place_environment(self):
         self.place_corner_treasures()
         self.place_oceans()
         self.place_obstacles()
         self.place_bots()
+        for faction in self.factions:
+            faction.invalidate_distances()
+        self.version += 1
+        self.terrain_version += 1
 
     def place_corner_treasures(self):
         for x, y in self.corner_coordinates.values():
-            tile = self.tiles[x][y]
-            if tile.type is None:
-                tile.type = TileType.LAND
-                tile.treasure = Resource.objectify(EMPTY_CORNER_TREASURE)
+            if self.tile_types[x, y] < 0:
+                self.tile_types[x, y] = tile_type_order.index(TileType.LAND)
+                self.treasures[x, y] = EMPTY_CORNER_TREASURE
 
     def place_oceans(self):
-        for ocean_tile in self.get_ocean_tiles():
-            ocean_tile.type = TileType.OCEAN
+        self.tile_types[self.ocean_mask] = tile_type_order.index(TileType.OCEAN)
 
     def place_obstacles(self):
-        for tile in self.get_flattened_tiles():
-            allow_obstacle = True
-            for corner_x, corner_y in self.corner_coordinates.values():
-                distance = Board.get_relative_distance(
-                    tile, self.tiles[corner_x][corner_y]
-                )
-                if distance <= 1:
-                    allow_obstacle = False
-            if allow_obstacle:
-                if random.random() <= OBSTACLE_FREQUENCY:
-                    tile.type = TileType.OBSTACLE
+        obstacle_rolls = self.rng.random((self.width, self.height))
+        self.obstacle_mask = (
+            (obstacle_rolls <= OBSTACLE_FREQUENCY)
+            & ~self.corner_mask
+            & ~self.ocean_mask
+        )
+        self.tile_types[self.obstacle_mask] = tile_type_order.index(TileType.OBSTACLE)
 
     def place_bots(self):
-        for tile in self.get_flattened_tiles():
-            if tile.type is None:
-                level = self.get_bot_level(tile)
-                tile.type = TileType.LAND
-                tile.max_hp = BOT_HP
-                tile.hp = tile.max_hp
-                army_size = BOT_BASE_ARMY_SIZE * level
-                army_composition = self.get_bot_army_composition(level)
-                if army_composition:
-                    for i in range(army_size):
-                        soldier_class = army_composition[i % len(army_composition)]
-                        tile.soldiers.append(soldier_class())
-                tile.treasure = Resource.objectify(
-                    (
-                        BOT_BASE_TREASURE[0] * level,
-                        BOT_BASE_TREASURE[1] * level,
-                        BOT_BASE_TREASURE[2] * level,
-                    )
-                )
-                tile.wall_count = max(0, level - 2)
+        bot_mask = (self.tile_types < 0) & ~self.ocean_mask & ~self.obstacle_mask
+        levels = self.get_bot_levels()[bot_mask]
+        self.tile_types[bot_mask] = tile_type_order.index(TileType.LAND)
+        self.max_hp[bot_mask] = BOT_HP
+        self.hp[bot_mask] = BOT_HP
+        self.treasures[bot_mask] = levels[:, np.newaxis] * np.array(BOT_BASE_TREASURE)
+        self.wall_counts[bot_mask] = np.maximum(0, levels - 2)
+
+        level_armies = np.array(
+            [
+                self.get_bot_army(level)
+                for level in range(int(levels.max(initial=0)) + 1)
+            ]
+        )
+        self.army_counts[bot_mask] = level_armies[levels]
 
     def get_bot_level(self, tile: Tile) -> int:
         x, y = tile.x, tile.y
@@ -634,6 +2168,13 @@ class Board:
         y_level = min(y, self.height - 1 - y)
         return max(x_level, y_level)
 
+    def get_bot_levels(self) -> np.ndarray:
+        xs = np.arange(self.width)[:, np.newaxis]
+        ys = np.arange(self.height)[np.newaxis, :]
+        x_levels = np.minimum(xs, self.width - 1 - xs)
+        y_levels = np.minimum(ys, self.height - 1 - ys)
+        return np.maximum(x_levels, y_levels)
+
     @staticmethod
     def get_bot_army_composition(level: int) -> List[Type[Unit]]:
         level_0: List[Type[Unit]] = []
@@ -642,7 +2183,24 @@ class Board:
         level_3 = level_2 + [Archer, HorseArcher]
 
         levels = [level_0, level_1, level_2, level_3]
-        return levels[level]
+        return levels[min(level, len(levels) - 1)]
+
+    @staticmethod
+    def get_bot_army(level: int) -> np.ndarray:
+        army_size = BOT_BASE_ARMY_SIZE * level
+        army_composition = Board.get_bot_army_composition(level)
+        counts = np.zeros(len(soldier_type_order), dtype=np.int32)
+        if army_composition:
+            indices = [
+                soldier_indices[
+                    army_composition[i % len(army_composition)].soldier_type
+                ]
+                for i in range(len(army_composition))
+            ]
+            per_slot = np.full(len(indices), army_size // len(indices))
+            per_slot[: army_size % len(indices)] += 1
+            np.add.at(counts, indices, per_slot)
+        return counts
 
     def place_player(self, player: Player, corner: Corner):
         x, y = self.corner_coordinates[corner]
@@ -653,11 +2211,12 @@ class Board:
         capital.hp = capital.max_hp
         capital.faction = player.faction
         capital.buildings = [House(capital)]
-        capital.soldiers = []
-        capital.treasure = Resource.objectify(CAPITAL_TREASURE)
+        capital.soldiers.clear()
+        capital.treasure = ResourceBundle(CAPITAL_TREASURE)
         capital.build_tower()
         capital.build_walls()
-        player.faction.controlled_tiles.append(capital)
+        player.faction.set_capital(capital)
+        player.faction.gain_tile(capital)
 
 
 class Building(ABC):
@@ -667,6 +2226,11 @@ class Building(ABC):
     def __init__(self, tile: Tile):
         self.tile = tile
 
+    def fork(self, tile: Tile) -> "Building":
+        building = copy.copy(self)
+        building.tile = tile
+        return building
+
 
 class ResidentialBuilding(Building):
     resident_type: Type[Unit]
@@ -674,54 +2238,110 @@ class ResidentialBuilding(Building):
     @abstractmethod
     def __init__(self, tile: Tile, capacity: int):
         self.capacity = capacity
-        self.residents: List[Unit] = []
+        self.resident_pool: Dict[Tuple, int] = {}
+        self.resident_count = 0
         super().__init__(tile)
+        self.epoch = tile.resident_epoch
+
+    def fork(self, tile: Tile) -> "ResidentialBuilding":
+        building = super().fork(tile)
+        building.resident_pool = dict(self.resident_pool)
+        return building
 
-    def have_space(self) -> bool:
-        return len(self.residents) < self.capacity
+    def sync_epoch(self):
+        epoch = self.tile.resident_epoch
+        if self.epoch != epoch:
+            self.resident_pool = {}
+            self.resident_count = 0
+            self.epoch = epoch
 
-    def add_resident(self, unit: Unit) -> None:
+    @property
+    def residents(self) -> Dict[Tuple, int]:
+        self.sync_epoch()
+        return self.resident_pool
+
+    def clear_residents(self):
+        self.resident_pool = {}
+        self.resident_count = 0
+
+    def have_space(self, count: int = 1) -> bool:
+        self.sync_epoch()
+        return self.resident_count + count <= self.capacity
+
+    def count_residents(self, unit_data: Dict) -> int:
+        return self.residents.get(Unit.signature(unit_data), 0)
+
+    def add_resident(self, unit: Unit, count: int = 1) -> bool:
         assert isinstance(unit, self.resident_type)
-        self.residents.append(unit)
+        if not self.have_space(count):
+            return False
+        key = Unit.signature(unit.get_properties())
+        self.resident_pool[key] = self.resident_pool.get(key, 0) + count
+        self.resident_count += count
+        return True
 
-    def remove_resident(self, unit_data: Dict) -> Optional[Unit]:
-        for unit in self.residents:
-            if unit.get_properties() == unit_data:
-                self.residents.remove(unit)
-                return unit
-        return None
+    def remove_resident(self, unit_data: Dict, count: int = 1) -> Optional[Unit]:
+        key = Unit.signature(unit_data)
+        resident_count = self.residents.get(key, 0)
+        if resident_count < count or count < 1:
+            return None
+        if resident_count == count:
+            del self.resident_pool[key]
+        else:
+            self.resident_pool[key] = resident_count - count
+        self.resident_count -= count
+        return self.resident_type.from_properties(unit_data)
 
 
-FARM_PRODUCTION_TYPE = Food
-FARM_CONSUMPTION_TYPE = Wood
-WOODCUTTER_PRODUCTION_TYPE = Wood
-WOODCUTTER_CONSUMPTION_TYPE = Food
-MINE_PRODUCTION_TYPE = Metal
-MINE_CONSUMPTION_TYPE = Wood
+FARM_PRODUCTION_TYPE = ResourceType.FOOD
+FARM_CONSUMPTION_TYPE = ResourceType.WOOD
+WOODCUTTER_PRODUCTION_TYPE = ResourceType.WOOD
+WOODCUTTER_CONSUMPTION_TYPE = ResourceType.FOOD
+MINE_PRODUCTION_TYPE = ResourceType.METAL
+MINE_CONSUMPTION_TYPE = ResourceType.WOOD
 
 
 class ProductionBuilding(ResidentialBuilding):
     resident_type = Worker
     production_rate: float
-    production_type: Type[Food | Wood | Metal]
+    production_type: ResourceType
     consumption_rate: float
-    consumption_type: Type[Food | Wood | Metal]
+    consumption_type: ResourceType
+    production: ResourceBundle
+    consumptions: Tuple[ResourceBundle, ResourceBundle]
 
     @abstractmethod
     def __init__(self, tile: Tile):
         super().__init__(tile, PRODUCTION_BUILDING_WORKER_CAPACITY)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile_rates()
+
+    @classmethod
+    def compile_rates(cls):
+        cls.production = ResourceBundle.single(cls.production_type, cls.production_rate)
+        cls.consumptions = (
+            ResourceBundle.single(cls.consumption_type, cls.consumption_rate),
+            ResourceBundle.single(cls.consumption_type, cls.consumption_rate * 2),
+        )
+
+    def worker_counts(self) -> Tuple[int, int]:
+        return (
+            self.count_residents({"has_tool": False}),
+            self.count_residents({"has_tool": True}),
+        )
+
     def produce(self):
         faction = self.tile.faction
         if faction:
-            for worker in self.residents:
-                assert isinstance(worker, Worker)
-                enhancer = 2 if worker.has_tool else 1
-                consumption = self.consumption_type(self.consumption_rate * enhancer)
-                if faction.has_resource(consumption):
-                    faction.use_resource(consumption)
-                    production = self.production_type(self.production_rate)
-                    faction.add_resource(production)
+            resources = faction.resources
+            for has_tool, worker_count in enumerate(self.worker_counts()):
+                consumption = self.consumptions[has_tool]
+                for _ in range(worker_count):
+                    if resources >= consumption:
+                        resources -= consumption
+                        resources += self.production
 
 
 class Farm(ProductionBuilding):
@@ -765,7 +2385,7 @@ class House(ResidentialBuilding):
         super().__init__(tile, HOUSE_CAPACITY)
 
     def create_worker(self, faction: Faction):
-        if faction.has_resources(Worker.cost):
+        if self.have_space() and faction.has_resources(Worker.cost):
             faction.use_resources(Worker.cost)
             worker = Worker()
             self.add_resident(worker)
@@ -805,14 +2425,19 @@ class MilitaryBuilding(Building):
         soldier_class = self.creatable_soldiers[soldier_type]
         if faction.has_resources(soldier_class.cost):
             faction.use_resources(soldier_class.cost)
-            soldier = soldier_class()
-            self.tile.soldiers.append(soldier)
+            self.tile.soldiers.add(soldier_class.soldier_type)
+            self.tile.board.army_changed(self.tile.x, self.tile.y, 1)
             return True
         return False
 
 
 class Barracks(MilitaryBuilding):
     building_type = BuildingType.BARRACK
+    creatable_soldiers = {
+        InfantryUnitType.SWORDSMAN: Swordsman,
+        InfantryUnitType.SPEARMAN: Spearman,
+        InfantryUnitType.ARCHER: Archer,
+    }
 
     def __init__(self, tile: Tile):
         super().__init__(tile)
@@ -820,6 +2445,11 @@ class Barracks(MilitaryBuilding):
 
 class Stable(MilitaryBuilding):
     building_type = BuildingType.STABLE
+    creatable_soldiers = {
+        CavalryUnitType.LIGHT_CAVALRY: LightCavalry,
+        CavalryUnitType.HEAVY_CAVALRY: HeavyCavalry,
+        CavalryUnitType.HORSE_ARCHER: HorseArcher,
+    }
 
     def __init__(self, tile: Tile):
         super().__init__(tile)
@@ -827,6 +2457,201 @@ class Stable(MilitaryBuilding):
 
 class Factory(MilitaryBuilding):
     building_type = BuildingType.FACTORY
+    creatable_soldiers = {SiegeUnitType.CANNON: Cannon}
+
+    def __init__(self, tile: Tile):
+        super().__init__(tile)
+
+
+class Dock(Building):
+    building_type = BuildingType.DOCK
 
     def __init__(self, tile: Tile):
         super().__init__(tile)
+
+
+class Economy:
+    def __init__(self, board: Board):
+        self.board = board
+
+    def collect_production_buildings(self) -> Dict[int, List[ProductionBuilding]]:
+        production_buildings: Dict[int, List[ProductionBuilding]] = {}
+        for x, y in sorted(self.board.buildings):
+            faction_id = int(self.board.faction_ids[x, y])
+            if faction_id < 0:
+                continue
+            for building in self.board.buildings[(x, y)]:
+                if isinstance(building, ProductionBuilding):
+                    production_buildings.setdefault(faction_id, []).append(building)
+        return production_buildings
+
+    @staticmethod
+    def expand_workers(
+        buildings: List[ProductionBuilding],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        worker_counts = np.array(
+            [building.worker_counts() for building in buildings], dtype=np.int64
+        ).reshape(-1)
+        consumption_rows = np.array(
+            [
+                consumption.amounts
+                for building in buildings
+                for consumption in building.consumptions
+            ]
+        ).reshape(-1, len(resource_type_order))
+        production_rows = np.array(
+            [building.production.amounts for building in buildings for _ in range(2)]
+        ).reshape(-1, len(resource_type_order))
+        return (
+            np.repeat(consumption_rows, worker_counts, axis=0),
+            np.repeat(production_rows, worker_counts, axis=0),
+        )
+
+    @staticmethod
+    def settle(
+        resources: np.ndarray, consumptions: np.ndarray, productions: np.ndarray
+    ):
+        """Applies production in worker order, skipping workers that cannot pay."""
+        net_changes = productions - consumptions
+        balances = resources + np.cumsum(net_changes, axis=0) - net_changes
+        affordable = (balances >= consumptions).all(axis=1)
+        first_shortage = (
+            len(affordable) if affordable.all() else int(affordable.argmin())
+        )
+        resources += net_changes[:first_shortage].sum(axis=0)
+        for consumption, net_change in zip(
+            consumptions[first_shortage:], net_changes[first_shortage:]
+        ):
+            if (resources >= consumption).all():
+                resources += net_change
+
+    def upkeep(self) -> np.ndarray:
+        faction_ids = self.board.faction_ids.ravel()
+        owned = faction_ids >= 0
+        soldiers = self.board.army_counts.sum(axis=2).ravel()[owned]
+        sheltered = self.board.army_status[..., 0].ravel()[owned]
+        transport = self.board.army_status[..., 1].ravel()[owned]
+        faction_count = len(self.board.factions)
+        unsheltered_totals = np.bincount(
+            faction_ids[owned], weights=soldiers - sheltered, minlength=faction_count
+        )
+        transport_totals = np.bincount(
+            faction_ids[owned], weights=transport, minlength=faction_count
+        )
+        return np.outer(
+            unsheltered_totals, Soldier.unsheltered_round_cost.amounts
+        ) + np.outer(transport_totals, Soldier.transport_round_cost.amounts)
+
+    def tick(self, factions: List[Faction]):
+        production_buildings = self.collect_production_buildings()
+        upkeep = self.upkeep()
+        for faction in factions:
+            faction_id = self.board.register_faction(faction)
+            resources = faction.resources.amounts
+            if buildings := production_buildings.get(faction_id):
+                Economy.settle(resources, *Economy.expand_workers(buildings))
+            if faction_id < len(upkeep):
+                resources -= upkeep[faction_id]
+                np.maximum(resources, 0, out=resources)
+
+
+class MoveTables:
+    move_classes: Dict[str, Type[Move]] = {}
+    building_classes: Dict[BuildingType, Type[Building]] = {}
+    building_costs: Dict[BuildingType, ResourceBundle] = {}
+    unit_types: Dict[
+        str, UnitType | InfantryUnitType | CavalryUnitType | SiegeUnitType
+    ] = {}
+    unit_costs: Dict[
+        UnitType | InfantryUnitType | CavalryUnitType | SiegeUnitType, ResourceBundle
+    ] = {}
+    unit_producers: Dict[
+        UnitType | InfantryUnitType | CavalryUnitType | SiegeUnitType, BuildingType
+    ] = {}
+    defensive_costs: Dict[DefensiveBuildings, ResourceBundle] = {}
+
+    @classmethod
+    def compile(cls):
+        cls.move_classes = {
+            move_class.move_type: move_class
+            for move_class in (
+                ArmyMove,
+                BuildMove,
+                CreateMove,
+                ModifyMove,
+                TransferMove,
+            )
+        }
+        cls.building_classes = {
+            building_class.building_type: building_class
+            for building_class in (
+                House,
+                MilitaryCamp,
+                Farm,
+                Woodcutter,
+                Mine,
+                Barracks,
+                Stable,
+                Factory,
+                Dock,
+            )
+        }
+        cls.building_costs = {
+            BuildingType.HOUSE: ResourceBundle(HOUSE_COST),
+            BuildingType.MILITARY_CAMP: ResourceBundle(MILITARY_CAMP_COST),
+            BuildingType.FARM: ResourceBundle(FARM_COST),
+            BuildingType.WOODCUTTER: ResourceBundle(WOODCUTTER_COST),
+            BuildingType.MINE: ResourceBundle(MINE_COST),
+            BuildingType.BARRACK: ResourceBundle(BARRACK_COST),
+            BuildingType.STABLE: ResourceBundle(STABLE_COST),
+            BuildingType.FACTORY: ResourceBundle(FACTORY_COST),
+            BuildingType.DOCK: ResourceBundle(DOCK_COST),
+        }
+        cls.unit_types = {UnitType.WORKER: UnitType.WORKER}
+        cls.unit_costs = {UnitType.WORKER: Worker.cost}
+        cls.unit_producers = {UnitType.WORKER: BuildingType.HOUSE}
+        for producer in (Barracks, Stable, Factory):
+            for soldier_type, soldier_class in producer.creatable_soldiers.items():
+                cls.unit_types[soldier_type] = soldier_type
+                cls.unit_costs[soldier_type] = soldier_class.cost
+                cls.unit_producers[soldier_type] = producer.building_type
+        cls.defensive_costs = {
+            DefensiveBuildings.WALLS: ResourceBundle(WALL_COST),
+            DefensiveBuildings.TOWER: ResourceBundle(TOWER_COST),
+        }
+
+
+MoveTables.compile()
+
+
+def compile_constant_tables(
+    counter_matrix: Optional[Dict[str, Dict[str, float]]] = None,
+):
+    """Re-reads class-level tables after module constants have been overridden."""
+    Worker.cost = ResourceBundle(WORKER_COST)
+    Worker.tool_cost = ResourceBundle(WORKER_TOOL_COST)
+    Soldier.unsheltered_round_cost = ResourceBundle(SOLDIER_UNSHELTERED_ROUND_COST)
+    Soldier.transport_round_cost = ResourceBundle(SOLDIER_TRANSPORT_ROUND_COST)
+    for soldier_class, cost in (
+        (Swordsman, SWORDSMAN_COST),
+        (Spearman, SPEARMAN_COST),
+        (Archer, ARCHER_COST),
+        (LightCavalry, LIGHT_CAVALRY_COST),
+        (HeavyCavalry, HEAVY_CAVALRY_COST),
+        (HorseArcher, HORSE_ARCHER_COST),
+        (Cannon, CANNON_COST),
+    ):
+        soldier_class.cost = ResourceBundle(cost)
+    Tile.building_capacity = TILE_BUILDING_CAPACITY
+    for building_class, production_rate, consumption_rate in (
+        (Farm, FARM_PRODUCTION_RATE, FARM_CONSUMPTION_RATE),
+        (Woodcutter, WOODCUTTER_PRODUCTION_RATE, WOODCUTTER_CONSUMPTION_RATE),
+        (Mine, MINE_PRODUCTION_RATE, MINE_CONSUMPTION_RATE),
+    ):
+        building_class.production_rate = production_rate
+        building_class.consumption_rate = consumption_rate
+        building_class.compile_rates()
+    if counter_matrix is not None:
+        War.counter_matrix = counter_matrix
+    War.compile_counter_matrix()
+    MoveTables.compile()
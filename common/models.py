@@ -1,12 +1,14 @@
-from pydantic import BaseModel
-from typing_extensions import Optional, Tuple
+from pydantic import BaseModel, Field
+from typing_extensions import List, Optional, Tuple
 
 from common.constants import DEFAULT_BOARD_SIZE, DEFAULT_OCEAN_WIDTH
+from common.enums import BotType
 
 
 class CreateNewGameRequest(BaseModel):
     board_size: int = DEFAULT_BOARD_SIZE
     ocean_width: int = DEFAULT_OCEAN_WIDTH
+    seed: Optional[int] = Field(None, ge=0)
 
 
 class AddPlayerRequest(BaseModel):
@@ -14,18 +16,29 @@ class AddPlayerRequest(BaseModel):
     player_name: str
 
 
+class AddBotRequest(BaseModel):
+    game_id: str
+    bot_type: BotType = BotType.MEDIUM
+
+
 class MakeMove(BaseModel):
     player_id: str
     first_tile: Tuple[int, int]
     second_tile: Optional[Tuple[int, int]]
     action_type: str
     amount: Optional[float]
+    target: Optional[str] = None
 
 
 class MakeMoveRequest(MakeMove):
     game_id: str
 
 
+class MakeMovesRequest(BaseModel):
+    game_id: str
+    moves: List[MakeMove]
+
+
 class DemoRequest(BaseModel):
     game_id: str
     x: int
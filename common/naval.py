@@ -0,0 +1,165 @@
+import copy
+from collections import deque
+
+import numpy as np
+from typing_extensions import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from common.game import Board
+
+
+class NavalGraph:
+    """Ocean connectivity and dock-to-dock crossings, updated as docks change."""
+
+    def __init__(self, board: "Board"):
+        self.board = board
+        coastal = np.flatnonzero((board.ocean_mask | board.shore_mask).reshape(-1))
+        rows = board.neighbor_table.reshape(-1, board.neighbor_table.shape[2])[coastal]
+        self.neighbors: Dict[int, List[int]] = {
+            index: [neighbor for neighbor in row if neighbor >= 0]
+            for index, row in zip(coastal.tolist(), rows.tolist())
+        }
+        self.ocean = board.ocean_mask.reshape(-1).tolist()
+        self.ocean_components = self.label_ocean_components()
+        self.shore_components: Dict[int, Tuple[int, ...]] = {
+            int(index): tuple(
+                sorted(
+                    {
+                        self.ocean_components[neighbor]
+                        for neighbor in self.neighbors[index]
+                        if self.ocean[neighbor]
+                    }
+                )
+            )
+            for index in np.flatnonzero(board.shore_mask.reshape(-1))
+        }
+        self.ocean_distances: Dict[int, Dict[int, int]] = {}
+        self.crossings: Dict[int, Dict[int, int]] = {}
+
+    def fork(self, board: "Board") -> "NavalGraph":
+        """Ocean labels and flood maps are never mutated, so forks share them."""
+        naval = copy.copy(self)
+        naval.board = board
+        naval.ocean_distances = dict(self.ocean_distances)
+        naval.crossings = {
+            dock: dict(crossings) for dock, crossings in self.crossings.items()
+        }
+        return naval
+
+    def label_ocean_components(self) -> List[int]:
+        labels = [-1] * len(self.ocean)
+        component = 0
+        for start in np.flatnonzero(self.board.ocean_mask.reshape(-1)).tolist():
+            if labels[start] >= 0:
+                continue
+            labels[start] = component
+            queue = deque([start])
+            while queue:
+                index = queue.popleft()
+                for neighbor in self.neighbors[index]:
+                    if self.ocean[neighbor] and labels[neighbor] < 0:
+                        labels[neighbor] = component
+                        queue.append(neighbor)
+            component += 1
+        return labels
+
+    def to_index(self, x: int, y: int) -> int:
+        return x * self.board.height + y
+
+    def component_labels(self) -> np.ndarray:
+        return np.array(self.ocean_components).reshape(
+            self.board.width, self.board.height
+        )
+
+    def components_of(self, x: int, y: int) -> Tuple[int, ...]:
+        return self.shore_components.get(self.to_index(x, y), ())
+
+    def share_ocean(self, tile_1: Tuple[int, int], tile_2: Tuple[int, int]) -> bool:
+        return bool(set(self.components_of(*tile_1)) & set(self.components_of(*tile_2)))
+
+    def flood_ocean(self, dock: int) -> Dict[int, int]:
+        """Steps from the dock to every ocean tile of its bodies of water."""
+        distances: Dict[int, int] = {}
+        queue = deque()
+        for neighbor in self.neighbors[dock]:
+            if self.ocean[neighbor]:
+                distances[neighbor] = 1
+                queue.append(neighbor)
+        while queue:
+            index = queue.popleft()
+            for neighbor in self.neighbors[index]:
+                if self.ocean[neighbor] and neighbor not in distances:
+                    distances[neighbor] = distances[index] + 1
+                    queue.append(neighbor)
+        return distances
+
+    def landing_steps(self, distances: Dict[int, int], dock: int) -> Optional[int]:
+        steps = [
+            distances[neighbor]
+            for neighbor in self.neighbors[dock]
+            if neighbor in distances
+        ]
+        return min(steps) + 1 if steps else None
+
+    def add_dock(self, x: int, y: int):
+        dock = self.to_index(x, y)
+        if dock in self.crossings or dock not in self.shore_components:
+            return
+        distances = self.flood_ocean(dock)
+        self.ocean_distances[dock] = distances
+        self.crossings[dock] = {}
+        for other_dock, other_crossings in self.crossings.items():
+            if other_dock == dock:
+                continue
+            steps = self.landing_steps(distances, other_dock)
+            if steps is not None:
+                self.crossings[dock][other_dock] = steps
+                other_crossings[dock] = steps
+
+    def remove_dock(self, x: int, y: int):
+        dock = self.to_index(x, y)
+        if self.crossings.pop(dock, None) is None:
+            return
+        self.ocean_distances.pop(dock, None)
+        for other_crossings in self.crossings.values():
+            other_crossings.pop(dock, None)
+
+    def has_dock(self, x: int, y: int) -> bool:
+        return self.to_index(x, y) in self.crossings
+
+    def crossing_steps(
+        self, source: Tuple[int, int], target: Tuple[int, int]
+    ) -> Optional[int]:
+        return self.crossings.get(self.to_index(*source), {}).get(
+            self.to_index(*target)
+        )
+
+    def landing_distance(
+        self, source: Tuple[int, int], target: Tuple[int, int]
+    ) -> Optional[int]:
+        distances = self.ocean_distances.get(self.to_index(*source))
+        if distances is None:
+            return None
+        return self.landing_steps(distances, self.to_index(*target))
+
+    def faction_crossings(self, faction_id: int) -> Dict[int, List[Tuple[int, int]]]:
+        owners = self.board.faction_ids.reshape(-1)
+        return {
+            dock: [
+                (other_dock, steps)
+                for other_dock, steps in crossings.items()
+                if owners[other_dock] == faction_id
+            ]
+            for dock, crossings in self.crossings.items()
+            if owners[dock] == faction_id
+        }
+
+    def can_transport(
+        self, faction_id: int, source: Tuple[int, int], target: Tuple[int, int]
+    ) -> bool:
+        owners = self.board.faction_ids
+        return (
+            owners[source] == faction_id
+            and owners[target] == faction_id
+            and self.crossing_steps(source, target) is not None
+        )
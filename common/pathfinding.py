@@ -0,0 +1,163 @@
+import copy
+import heapq
+import math
+from collections import OrderedDict
+
+import numpy as np
+from typing_extensions import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from common.constants import (ARMY_MOVE_BUDGET, ATTACK_MOVE_PER_TILE,
+                              PATH_CACHE_SIZE)
+
+if TYPE_CHECKING:
+    from common.game import Board
+
+
+class Route:
+    def __init__(self, cost: float, tiles: List[Tuple[int, int]]):
+        self.cost = cost
+        self.tiles = tiles
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __repr__(self):
+        return f"Route(cost={self.cost}, tiles={self.tiles})"
+
+
+class SearchTree:
+    """Costs and predecessors of the tiles within the move budget, by flat index."""
+
+    def __init__(self, costs: Dict[int, float], previous: Dict[int, int]):
+        self.costs = costs
+        self.previous = previous
+
+
+class Pathfinder:
+    """Shortest army routes over land and between docks, cached per board version."""
+
+    def __init__(self, board: "Board"):
+        self.board = board
+        self.version = -1
+        self.cache: OrderedDict[Tuple[int, int], SearchTree] = OrderedDict()
+        self.terrain_version = -1
+        self.walkable_neighbors: Dict[int, List[int]] = {}
+        self.docks: Dict[int, Dict[int, List[Tuple[int, float]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def fork(self, board: "Board") -> "Pathfinder":
+        """Search trees are immutable, so the fork starts from a copy of the cache."""
+        pathfinder = copy.copy(self)
+        pathfinder.board = board
+        pathfinder.cache = OrderedDict(self.cache)
+        pathfinder.docks = dict(self.docks)
+        pathfinder.hits = 0
+        pathfinder.misses = 0
+        return pathfinder
+
+    def refresh(self):
+        board = self.board
+        if self.terrain_version != board.terrain_version:
+            self.walkable_neighbors = {}
+            self.terrain_version = board.terrain_version
+        if self.version == board.version:
+            return
+        self.docks = {}
+        self.cache.clear()
+        self.version = board.version
+
+    def dock_crossings(self, faction_id: int) -> Dict[int, List[Tuple[int, float]]]:
+        if faction_id not in self.docks:
+            self.docks[faction_id] = {
+                dock: [
+                    (other_dock, steps * ATTACK_MOVE_PER_TILE)
+                    for other_dock, steps in crossings
+                ]
+                for dock, crossings in self.board.naval.faction_crossings(
+                    faction_id
+                ).items()
+            }
+        return self.docks[faction_id]
+
+    def neighbors(self, index: int) -> List[int]:
+        """Walkable neighbors, built per tile on first visit until the terrain changes."""
+        if (neighbors := self.walkable_neighbors.get(index)) is None:
+            board = self.board
+            x, y = divmod(index, board.height)
+            neighbors = [
+                neighbor
+                for neighbor in board.neighbor_table[x, y].tolist()
+                if neighbor >= 0
+                and not board.ocean_mask.item(neighbor)
+                and not board.obstacle_mask.item(neighbor)
+            ]
+            self.walkable_neighbors[index] = neighbors
+        return neighbors
+
+    def search(self, faction_id: int, source: int) -> SearchTree:
+        """Dijkstra from source through owned tiles, cut off at the move budget."""
+        owners = self.board.faction_ids
+        budget = ARMY_MOVE_BUDGET
+        costs = {source: 0.0}
+        previous = {source: -1}
+        heap = [(0.0, source)]
+        dock_crossings = self.dock_crossings(faction_id)
+        while heap:
+            cost, index = heapq.heappop(heap)
+            if cost > costs[index]:
+                continue
+            if index != source and owners.item(index) != faction_id:
+                continue
+            steps = [
+                (neighbor, ATTACK_MOVE_PER_TILE) for neighbor in self.neighbors(index)
+            ]
+            steps.extend(dock_crossings.get(index, ()))
+            for neighbor, step_cost in steps:
+                next_cost = cost + step_cost
+                if next_cost <= budget and next_cost < costs.get(neighbor, math.inf):
+                    costs[neighbor] = next_cost
+                    previous[neighbor] = index
+                    heapq.heappush(heap, (next_cost, neighbor))
+        return SearchTree(costs, previous)
+
+    def search_tree(self, faction_id: int, source: Tuple[int, int]) -> SearchTree:
+        self.refresh()
+        key = (faction_id, source[0] * self.board.height + source[1])
+        if tree := self.cache.get(key):
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return tree
+        self.misses += 1
+        tree = self.search(*key)
+        self.cache[key] = tree
+        if len(self.cache) > PATH_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return tree
+
+    def path_cost(
+        self, faction_id: int, source: Tuple[int, int], target: Tuple[int, int]
+    ) -> Optional[float]:
+        tree = self.search_tree(faction_id, source)
+        return tree.costs.get(target[0] * self.board.height + target[1])
+
+    def find_path(
+        self, faction_id: int, source: Tuple[int, int], target: Tuple[int, int]
+    ) -> Optional[Route]:
+        tree = self.search_tree(faction_id, source)
+        height = self.board.height
+        index = target[0] * height + target[1]
+        if index not in tree.costs:
+            return None
+        cost = tree.costs[index]
+        tiles = []
+        while index >= 0:
+            tiles.append(divmod(index, height))
+            index = tree.previous[index]
+        return Route(cost, tiles[::-1])
+
+    def reachable_mask(self, faction_id: int, source: Tuple[int, int]) -> np.ndarray:
+        tree = self.search_tree(faction_id, source)
+        mask = np.zeros(self.board.width * self.board.height, dtype=bool)
+        mask[list(tree.costs)] = True
+        return mask.reshape(self.board.width, self.board.height)
@@ -0,0 +1,354 @@
+import json
+import struct
+
+import numpy as np
+from typing_extensions import List, Optional, Sequence, Tuple
+
+from common.enums import BotType, BuildingType, Corner
+from common.game import (Board, Building, DistanceField, Economy, Faction,
+                         Game, MoveTables, Player, ResidentialBuilding,
+                         Territory, Tile)
+
+FORMAT_MAGIC = b"CQGS"
+FORMAT_VERSION = 2
+
+HEADER = struct.Struct("<4sHHHHBIIIQ")
+FLAGS = struct.Struct("<B")
+COUNT = struct.Struct("<H")
+LARGE_COUNT = struct.Struct("<I")
+FACTION = struct.Struct("<3dHhhB")
+PLAYER = struct.Struct("<hbB")
+BUILDING = struct.Struct("<HHBiI")
+GENERATOR = struct.Struct("<16s16sBI")
+
+tile_fields: Tuple[Tuple[str, str, Tuple[int, ...]], ...] = (
+    ("tile_types", "<i1", ()),
+    ("max_hp", "<f8", ()),
+    ("hp", "<f8", ()),
+    ("faction_ids", "<i2", ()),
+    ("wall_counts", "<f8", ()),
+    ("tower_counts", "<i2", ()),
+    ("treasures", "<f8", (3,)),
+    ("army_counts", "<i4", (7,)),
+    ("army_status", "<i4", (2,)),
+    ("resident_epochs", "<i4", ()),
+    ("obstacle_mask", "|b1", ()),
+)
+building_type_order: List[BuildingType] = list(BuildingType)
+bot_type_order: List[BotType] = list(BotType)
+corner_order: List[Corner] = list(Corner)
+Capital = Tuple[Optional[Tuple[int, int]], bool]
+
+
+class Writer:
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes):
+        self.parts.append(data)
+        self.size += len(data)
+
+    def pack(self, layout: struct.Struct, *values):
+        self.write(layout.pack(*values))
+
+    def string(self, text: str):
+        data = text.encode()
+        self.pack(COUNT, len(data))
+        self.write(data)
+
+    def integer(self, value: int):
+        data = value.to_bytes((value.bit_length() + 8) // 8, "little", signed=True)
+        self.pack(FLAGS, len(data))
+        self.write(data)
+
+    def array(self, array: np.ndarray, dtype: str):
+        """Aligns to 8 bytes so the reader can map the array in place."""
+        self.write(b"\0" * (-self.size % 8))
+        self.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+
+class Reader:
+    def __init__(self, data: bytes | bytearray | memoryview):
+        self.data = data
+        self.offset = 0
+
+    def read(self, size: int) -> bytes:
+        data = bytes(self.data[self.offset : self.offset + size])
+        if len(data) < size:
+            raise ValueError("Game state is truncated")
+        self.offset += size
+        return data
+
+    def unpack(self, layout: struct.Struct) -> Tuple:
+        return layout.unpack(self.read(layout.size))
+
+    def string(self) -> str:
+        (size,) = self.unpack(COUNT)
+        return self.read(size).decode()
+
+    def integer(self) -> int:
+        (size,) = self.unpack(FLAGS)
+        return int.from_bytes(self.read(size), "little", signed=True)
+
+    def array(self, dtype: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """A view into the buffer; it is writable when the buffer is."""
+        self.offset += -self.offset % 8
+        count = int(np.prod(shape))
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset += array.nbytes
+        return array.reshape(shape)
+
+
+def write_generator(writer: Writer, rng: np.random.Generator):
+    state = rng.bit_generator.state
+    writer.pack(
+        GENERATOR,
+        state["state"]["state"].to_bytes(16, "little"),
+        state["state"]["inc"].to_bytes(16, "little"),
+        state["has_uint32"],
+        state["uinteger"],
+    )
+
+
+def read_generator(reader: Reader) -> np.random.Generator:
+    state, increment, has_uint32, uinteger = reader.unpack(GENERATOR)
+    bit_generator = np.random.PCG64()
+    bit_generator.state = {
+        "bit_generator": "PCG64",
+        "state": {
+            "state": int.from_bytes(state, "little"),
+            "inc": int.from_bytes(increment, "little"),
+        },
+        "has_uint32": has_uint32,
+        "uinteger": uinteger,
+    }
+    return np.random.Generator(bit_generator)
+
+
+def unlocked_mask(faction: Faction) -> int:
+    return sum(
+        1 << index
+        for index, building_type in enumerate(building_type_order)
+        if faction.unlocked_buildings[building_type]
+    )
+
+
+def faction_record(faction: Faction) -> Tuple:
+    capital = faction.territory.capital if faction.territory else None
+    return (
+        *faction.resources.to_tuple(),
+        unlocked_mask(faction),
+        *(capital or (-1, -1)),
+        faction.territory is not None,
+    )
+
+
+def restore_faction(faction: Faction, record: Sequence) -> Capital:
+    """Applies a faction record and returns the capital to rebuild the territory."""
+    *resources, unlocked, capital_x, capital_y, has_territory = record
+    faction.resources.amounts[:] = resources
+    faction.unlocked_buildings = {
+        building_type: bool(unlocked >> index & 1)
+        for index, building_type in enumerate(building_type_order)
+    }
+    capital = (capital_x, capital_y) if capital_x >= 0 else None
+    return capital, bool(has_territory)
+
+
+def building_record(building: Building) -> Tuple[int, int, List[Tuple[Tuple, int]]]:
+    residential = isinstance(building, ResidentialBuilding)
+    return (
+        building_type_order.index(building.building_type),
+        building.epoch if residential else -1,
+        list(building.residents.items()) if residential else [],
+    )
+
+
+def restore_building(tile: Tile, record: Sequence) -> Building:
+    type_index, epoch, pool = record
+    building = MoveTables.building_classes[building_type_order[type_index]](tile)
+    for signature, count in pool:
+        building.resident_pool[tuple(tuple(pair) for pair in signature)] = count
+        building.resident_count += count
+    if isinstance(building, ResidentialBuilding):
+        building.epoch = epoch
+    return building
+
+
+def rebuild_territories(board: Board, capitals: List[Capital]):
+    """Territories and distance fields are derived from the faction id array."""
+    for faction_id, (faction, (capital, has_territory)) in enumerate(
+        zip(board.factions, capitals)
+    ):
+        faction.territory = None
+        faction.distance_field = None
+        if not has_territory:
+            continue
+        faction.territory = Territory(board, faction_id, capital)
+        if capital:
+            faction.distance_field = DistanceField(board, faction_id, capital)
+        for x, y in np.argwhere(board.faction_ids == faction_id):
+            faction.territory.add(Tile(board, int(x), int(y)))
+
+
+def encode_game(game: Game) -> bytes:
+    """Packs tile fields as raw arrays plus small records for everything else."""
+    board = game.board
+    writer = Writer()
+    writer.pack(
+        HEADER,
+        FORMAT_MAGIC,
+        FORMAT_VERSION,
+        board.width,
+        board.height,
+        board.ocean_width,
+        game.started,
+        game.turn_count,
+        game.round,
+        board.version,
+        game.state_version,
+    )
+    writer.string(game.id)
+    writer.integer(game.seed)
+    write_generator(writer, game.rng)
+    write_generator(writer, board.rng)
+
+    writer.pack(COUNT, len(board.factions))
+    for faction in board.factions:
+        writer.string(faction.color)
+        writer.pack(FACTION, *faction_record(faction))
+
+    players = {player.id: index for index, player in enumerate(game.players)}
+    writer.pack(COUNT, len(game.players))
+    for player_id, player_name, corner, bot_type in game.seats:
+        player = game.players[players[player_id]]
+        writer.string(player_id)
+        writer.string(player_name)
+        writer.pack(
+            PLAYER,
+            board.register_faction(player.faction),
+            bot_type_order.index(bot_type) if bot_type else -1,
+            corner_order.index(corner),
+        )
+    writer.pack(COUNT, len(game.turn_queue))
+    writer.write(
+        struct.pack(
+            f"<{len(game.turn_queue)}H",
+            *(players[player.id] for player in game.turn_queue),
+        )
+    )
+    writer.pack(
+        FLAGS,
+        sum(
+            1 << index
+            for index, corner in enumerate(corner_order)
+            if board.corner_occupations[corner]
+        ),
+    )
+
+    buildings = [
+        (x, y, building)
+        for (x, y), tile_buildings in board.buildings.items()
+        for building in tile_buildings
+    ]
+    writer.pack(LARGE_COUNT, len(buildings))
+    for x, y, building in buildings:
+        type_index, epoch, pool = building_record(building)
+        writer.pack(BUILDING, x, y, type_index, epoch, len(pool))
+        for signature, count in pool:
+            writer.string(json.dumps(signature))
+            writer.pack(LARGE_COUNT, count)
+
+    for name, dtype, _ in tile_fields:
+        writer.array(getattr(board, name), dtype)
+    return writer.getvalue()
+
+
+def decode_game(data: bytes | bytearray | memoryview) -> Game:
+    """Tile arrays are views into data; pass a bytearray to get a mutable game."""
+    reader = Reader(data)
+    (
+        magic,
+        version,
+        width,
+        height,
+        ocean_width,
+        started,
+        turn_count,
+        round_number,
+        board_version,
+        state_version,
+    ) = reader.unpack(HEADER)
+    if magic != FORMAT_MAGIC:
+        raise ValueError("Not a game state")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported game state format version {version}")
+
+    game = Game.__new__(Game)
+    game.id = reader.string()
+    game.seed = reader.integer()
+    game.rng = read_generator(reader)
+    board = Board(width, height, ocean_width, read_generator(reader))
+    board.version = board_version
+    game.board = board
+    game.started = bool(started)
+    game.turn_count = turn_count
+    game.round = round_number
+    game.economy = Economy(board)
+    game.timing_hook = None
+    game.undo_state = None
+    game.move_log = []
+    game.state_version = state_version
+
+    (faction_count,) = reader.unpack(COUNT)
+    capitals: List[Capital] = []
+    for _ in range(faction_count):
+        faction = Faction(reader.string())
+        capitals.append(restore_faction(faction, reader.unpack(FACTION)))
+        board.factions.append(faction)
+
+    (player_count,) = reader.unpack(COUNT)
+    game.players = []
+    game.seats = []
+    for _ in range(player_count):
+        player_id = reader.string()
+        player_name = reader.string()
+        faction_id, bot_index, corner_index = reader.unpack(PLAYER)
+        bot_type = bot_type_order[bot_index] if bot_index >= 0 else None
+        corner = corner_order[corner_index]
+        player = Player(board.factions[faction_id], player_name, bot_type, player_id)
+        game.players.append(player)
+        game.seats.append((player_id, player_name, corner, bot_type))
+    (queue_length,) = reader.unpack(COUNT)
+    game.turn_queue = [
+        game.players[index]
+        for index in struct.unpack(f"<{queue_length}H", reader.read(2 * queue_length))
+    ]
+    (occupations,) = reader.unpack(FLAGS)
+    for index, corner in enumerate(corner_order):
+        board.corner_occupations[corner] = bool(occupations >> index & 1)
+
+    (building_count,) = reader.unpack(LARGE_COUNT)
+    for _ in range(building_count):
+        x, y, type_index, epoch, pool_size = reader.unpack(BUILDING)
+        pool = [
+            (json.loads(reader.string()), reader.unpack(LARGE_COUNT)[0])
+            for _ in range(pool_size)
+        ]
+        building = restore_building(Tile(board, x, y), (type_index, epoch, pool))
+        board.buildings.setdefault((x, y), []).append(building)
+
+    for name, dtype, shape in tile_fields:
+        setattr(board, name, reader.array(dtype, (width, height, *shape)))
+
+    for (x, y), tile_buildings in board.buildings.items():
+        if any(
+            building.building_type == BuildingType.DOCK for building in tile_buildings
+        ):
+            board.naval.add_dock(x, y)
+    rebuild_territories(board, capitals)
+    return game
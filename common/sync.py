@@ -0,0 +1,175 @@
+import base64
+
+import numpy as np
+from typing_extensions import Dict, List, Tuple
+
+from common.constants import SYNC_KEYFRAME_INTERVAL
+from common.enums import BuildingType
+from common.game import Board, Faction, Game, Player, Tile
+from common.serialization import (Capital, bot_type_order, building_record,
+                                  building_type_order, corner_order,
+                                  decode_game, faction_record,
+                                  rebuild_territories, restore_building,
+                                  restore_faction, tile_fields)
+
+RAW_FRAME = b"\x00"
+COMPRESSED_FRAME = b"\x01"
+
+dock_index = building_type_order.index(BuildingType.DOCK)
+
+
+def building_records(board: Board) -> Dict[Tuple[int, int], List[Tuple]]:
+    return {
+        coordinates: [building_record(building) for building in tile_buildings]
+        for coordinates, tile_buildings in board.buildings.items()
+        if tile_buildings
+    }
+
+
+class StateTracker:
+    """Remembers what a game's clients were last sent and diffs against it."""
+
+    def __init__(self, game: Game):
+        self.reset(game)
+
+    def reset(self, game: Game):
+        board = game.board
+        self.version = game.state_version
+        self.tiles = {name: getattr(board, name).copy() for name, _, _ in tile_fields}
+        self.buildings = building_records(board)
+        self.deltas_sent = 0
+
+    @property
+    def keyframe_due(self) -> bool:
+        return self.deltas_sent + 1 >= SYNC_KEYFRAME_INTERVAL
+
+    def keyframe(self, game: Game, state: bytes) -> dict:
+        """The full encoded state; clients replace their copy instead of patching it."""
+        self.reset(game)
+        return {
+            "type": "keyframe",
+            "seq": game.state_version,
+            "state": base64.b64encode(state).decode(),
+        }
+
+    def delta(self, game: Game) -> dict:
+        """Changed tile fields and buildings, plus the small per-game records."""
+        board = game.board
+        tile_count = board.width * board.height
+        tiles = {}
+        for name, _, shape in tile_fields:
+            current = getattr(board, name)
+            previous = self.tiles[name]
+            changed = np.flatnonzero(
+                (current != previous).reshape(tile_count, -1).any(axis=1)
+            )
+            if changed.size:
+                values = current.reshape(tile_count, *shape)[changed]
+                tiles[name] = [changed.tolist(), values.tolist()]
+                previous[...] = current
+
+        buildings = building_records(board)
+        changed_buildings = [
+            [x * board.height + y, buildings.get((x, y), [])]
+            for x, y in self.buildings.keys() | buildings.keys()
+            if self.buildings.get((x, y)) != buildings.get((x, y))
+        ]
+        self.buildings = buildings
+
+        players = {player.id: index for index, player in enumerate(game.players)}
+        message = {
+            "type": "delta",
+            "seq": game.state_version,
+            "base": self.version,
+            "details": {
+                "started": game.started,
+                "turn_count": game.turn_count,
+                "round": game.round,
+                "board_version": board.version,
+                "tiles": tiles,
+                "buildings": changed_buildings,
+                "factions": [
+                    [faction.color, *faction_record(faction)]
+                    for faction in board.factions
+                ],
+                "seats": [
+                    [
+                        player_id,
+                        player_name,
+                        corner_order.index(corner),
+                        bot_type_order.index(bot_type) if bot_type else -1,
+                        board.register_faction(
+                            game.players[players[player_id]].faction
+                        ),
+                    ]
+                    for player_id, player_name, corner, bot_type in game.seats
+                ],
+                "turn_queue": [players[player.id] for player in game.turn_queue],
+                "corners": [
+                    board.corner_occupations[corner] for corner in corner_order
+                ],
+            },
+        }
+        self.version = game.state_version
+        self.deltas_sent += 1
+        return message
+
+
+def read_keyframe(message: dict) -> Game:
+    return decode_game(bytearray(base64.b64decode(message["state"])))
+
+
+def apply_delta(game: Game, message: dict) -> bool:
+    """Patches the game in place; False means it is not at the delta's base version."""
+    if message["base"] != game.state_version:
+        return False
+    details = message["details"]
+    board = game.board
+    tile_count = board.width * board.height
+
+    for name, _, shape in tile_fields:
+        if name in details["tiles"]:
+            indices, values = details["tiles"][name]
+            getattr(board, name).reshape(tile_count, *shape)[indices] = values
+    if "obstacle_mask" in details["tiles"]:
+        board.terrain_version += 1
+
+    for index, records in details["buildings"]:
+        x, y = divmod(index, board.height)
+        had_dock = board.naval.has_dock(x, y)
+        board.buildings.pop((x, y), None)
+        if records:
+            tile = Tile(board, x, y)
+            board.buildings[(x, y)] = [
+                restore_building(tile, record) for record in records
+            ]
+        has_dock = any(record[0] == dock_index for record in records)
+        if had_dock and not has_dock:
+            board.naval.remove_dock(x, y)
+        elif has_dock and not had_dock:
+            board.naval.add_dock(x, y)
+
+    capitals: List[Capital] = []
+    for index, (color, *record) in enumerate(details["factions"]):
+        if index == len(board.factions):
+            board.factions.append(Faction(color))
+        capitals.append(restore_faction(board.factions[index], record))
+    rebuild_territories(board, capitals)
+
+    new_seats = details["seats"][len(game.seats) :]
+    for player_id, player_name, corner_index, bot_index, faction_id in new_seats:
+        bot_type = bot_type_order[bot_index] if bot_index >= 0 else None
+        corner = corner_order[corner_index]
+        player = Player(board.factions[faction_id], player_name, bot_type, player_id)
+        game.players.append(player)
+        game.seats.append((player_id, player_name, corner, bot_type))
+    game.turn_queue = [game.players[index] for index in details["turn_queue"]]
+    for corner, occupied in zip(corner_order, details["corners"]):
+        board.corner_occupations[corner] = occupied
+
+    game.started = details["started"]
+    game.turn_count = details["turn_count"]
+    game.round = details["round"]
+    board.version = details["board_version"]
+    game.state_version = message["seq"]
+    return True
@@ -1,4 +1,7 @@
+import ast
+
 import typer
+from typing_extensions import List, Optional
 
 app = typer.Typer()
 
@@ -17,5 +20,53 @@ def start_client():
     client()
 
 
+@app.command()
+def benchmark_board(repeats: int = 3):
+    from benchmarks.board import run
+
+    run(repeats=repeats)
+
+
+@app.command()
+def benchmark_serialization(repeats: int = 5):
+    from benchmarks.serialization import run
+
+    run(repeats=repeats)
+
+
+@app.command()
+def simulate(
+    games: int = 100,
+    policies: List[str] = typer.Option(["Weak", "Random"]),
+    board_size: int = 12,
+    max_rounds: int = 50,
+    override: List[str] = typer.Option([], help="NAME=VALUE, e.g. FARM_COST=(1,0,0)"),
+    workers: Optional[int] = None,
+    output: str = "self_play.npz",
+    seed: Optional[int] = None,
+):
+    from simulation.self_play import corner_order, run
+
+    if not 1 <= len(policies) <= len(corner_order):
+        raise typer.BadParameter(
+            f"between 1 and {len(corner_order)} policies are needed, one per corner",
+            param_hint="--policies",
+        )
+    overrides = {}
+    for assignment in override:
+        name, value = assignment.split("=", 1)
+        overrides[name.strip()] = ast.literal_eval(value.strip())
+    run(
+        games,
+        policies,
+        board_size=board_size,
+        max_rounds=max_rounds,
+        overrides=overrides,
+        workers=workers,
+        output=output,
+        seed=seed,
+    )
+
+
 if __name__ == "__main__":
     app()
@@ -1,35 +1,58 @@
 import asyncio
 import os
-import pickle
+from concurrent.futures import ProcessPoolExecutor
 
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import (Depends, FastAPI, HTTPException, Request, Response,
                      WebSocket, WebSocketDisconnect)
-from typing_extensions import Dict
+from typing_extensions import Dict, Tuple
 
+from common.ai import plan_turn
+from common.constants import BOT_SEARCH_WORKERS, SLOW_CONSUMER_POLICY
+from common.enums import SlowConsumerPolicy
 from common.game import Game
 from common.models import *
+from common.serialization import encode_game
+from common.sync import StateTracker
 from server.web_socket_manager import ConnectionManager
 
 manager: ConnectionManager
 games: Dict[str, Game]
+state_cache: Dict[str, Tuple[int, bytes]]
+trackers: Dict[str, StateTracker]
+bot_executor: ProcessPoolExecutor
+bot_tasks: Dict[str, asyncio.Task]
 API_KEY: str
 ENVIRONMENT: str
 
 
 async def startup():
-    global manager, games, API_KEY, ENVIRONMENT
-    manager = ConnectionManager()
-    games = {}
+    global manager, games, state_cache, trackers, bot_executor, bot_tasks
+    global API_KEY, ENVIRONMENT
     load_dotenv()
+    manager = ConnectionManager(
+        policy=SlowConsumerPolicy(
+            os.environ.get("SLOW_CONSUMER_POLICY", SLOW_CONSUMER_POLICY)
+        )
+    )
+    games = {}
+    state_cache = {}
+    trackers = {}
+    bot_executor = ProcessPoolExecutor(BOT_SEARCH_WORKERS)
+    bot_tasks = {}
     API_KEY = os.environ.get("API_KEY", "")
     ENVIRONMENT = os.environ.get("ENVIRONMENT", "")
 
 
 async def shutdown():
+    for task in bot_tasks.values():
+        task.cancel()
+    bot_executor.shutdown(cancel_futures=True)
     await manager.cleanup()
     games.clear()
+    state_cache.clear()
+    trackers.clear()
 
 
 async def require_api_key(request: Request):
@@ -38,6 +61,43 @@ async def require_api_key(request: Request):
         raise HTTPException(status_code=401, detail="Invalid API key")
 
 
+def schedule_bots(game_id: str):
+    task = bot_tasks.get(game_id)
+    if task is None or task.done():
+        bot_tasks[game_id] = asyncio.create_task(run_bots(game_id))
+
+
+async def run_bots(game_id: str):
+    """Plays bot turns off the event loop until a human player is next."""
+    loop = asyncio.get_running_loop()
+    while game_id in games:
+        game = games[game_id]
+        player = game.current_player()
+        if not (game.started and player and player.bot_type):
+            return
+        moves = await loop.run_in_executor(
+            None, plan_turn, game.fork(), player.id, bot_executor
+        )
+        if games.get(game_id) is not game or game.current_player() is not player:
+            return
+        if not game.apply_moves(moves):
+            game.pass_turn(player.id)
+        await publish_state(game_id)
+
+
+async def publish_state(game_id: str):
+    """Sends clients a delta since the last published version, or a keyframe."""
+    game = games.get(game_id)
+    tracker = trackers.get(game_id)
+    if not (game and tracker) or tracker.version == game.state_version:
+        return
+    if tracker.keyframe_due:
+        message = tracker.keyframe(game, encoded_state(game))
+    else:
+        message = tracker.delta(game)
+    await manager.broadcast(message, game_id)
+
+
 app = FastAPI(
     on_startup=[startup],
     on_shutdown=[shutdown],
@@ -49,11 +109,12 @@ async def create_new_game(request: CreateNewGameRequest):
     board_size = request.board_size
     ocean_width = request.ocean_width
 
-    new_game = Game(board_size, ocean_width)
+    new_game = Game(board_size, ocean_width, request.seed)
     game_id = new_game.id
     games[game_id] = new_game
+    trackers[game_id] = StateTracker(new_game)
     manager.active_connections[game_id] = []
-    return {"game_id": game_id}
+    return {"game_id": game_id, "seed": new_game.seed}
 
 
 @app.post("/start_game", dependencies=[Depends(require_api_key)])
@@ -62,6 +123,8 @@ async def start_game(request: StartGameRequest):
     if game_id in games:
         game = games[game_id]
         game.start()
+        await publish_state(game_id)
+        schedule_bots(game_id)
         return Response(content="Game started", status_code=200)
     else:
         return Response(content="Game with given id does not exist", status_code=400)
@@ -71,6 +134,10 @@ async def start_game(request: StartGameRequest):
 async def delete_game(game_id: str):
     if game_id in games:
         del games[game_id]
+        state_cache.pop(game_id, None)
+        trackers.pop(game_id, None)
+        if task := bot_tasks.pop(game_id, None):
+            task.cancel()
         await manager.cleanup_game(game_id)
         return Response(content="Game deleted", status_code=200)
     else:
@@ -94,6 +161,32 @@ async def add_player(request: AddPlayerRequest):
                     game_id=game_id,
                 )
             )
+            asyncio.create_task(publish_state(game_id))
+            return {"player_id": player_id}
+        else:
+            return Response(content="Game is already full", status_code=400)
+    else:
+        return Response(content="Game with given id does not exist", status_code=400)
+
+
+@app.post("/add_bot", dependencies=[Depends(require_api_key)])
+async def add_bot(request: AddBotRequest):
+    game_id = request.game_id
+    if game_id in games:
+        game = games[game_id]
+        if corner := game.get_empty_corner():
+            player_name = f"{request.bot_type} Bot"
+            player_id = game.add_player(player_name, corner, request.bot_type)
+            asyncio.create_task(
+                manager.broadcast(
+                    data={
+                        "type": "join",
+                        "details": {"player_name": player_name, "corner": corner},
+                    },
+                    game_id=game_id,
+                )
+            )
+            asyncio.create_task(publish_state(game_id))
             return {"player_id": player_id}
         else:
             return Response(content="Game is already full", status_code=400)
@@ -107,15 +200,33 @@ async def make_move(request: MakeMoveRequest):
     if game_id in games:
         game = games[game_id]
         move = MakeMove(**request.model_dump(exclude={"game_id"}))
-        if result := game.make_move(move):
-            await manager.broadcast(result.to_dict(), game_id)
-            return Response(content="Move successful", status_code=200)
+        result = game.make_move(move)
+        if result:
+            await publish_state(game_id)
+            schedule_bots(game_id)
+            return result.to_dict()
         else:
             return Response(content="Invalid move", status_code=400)
     else:
         return Response(content="Game with given id does not exist", status_code=400)
 
 
+@app.post("/make_moves", dependencies=[Depends(require_api_key)])
+async def make_moves(request: MakeMovesRequest):
+    game_id = request.game_id
+    if game_id in games:
+        game = games[game_id]
+        result = game.apply_moves(request.moves)
+        if result:
+            await publish_state(game_id)
+            schedule_bots(game_id)
+            return result.to_dict()
+        else:
+            return Response(content="Invalid moves", status_code=400)
+    else:
+        return Response(content="Game with given id does not exist", status_code=400)
+
+
 @app.post("/demo_move", dependencies=[Depends(require_api_key)])
 async def demo_move(request: DemoRequest):
     game_id = request.game_id
@@ -127,12 +238,27 @@ async def demo_move(request: DemoRequest):
     return Response(content="Such game does not exist", status_code=400)
 
 
+def encoded_state(game: Game) -> bytes:
+    """Serialized state, re-encoded only when the game has a newer state version."""
+    cached = state_cache.get(game.id)
+    if cached is None or cached[0] != game.state_version:
+        cached = (game.state_version, encode_game(game))
+        state_cache[game.id] = cached
+    return cached[1]
+
+
 @app.get("/game_state", dependencies=[Depends(require_api_key)])
-async def game_state(game_id: str):
+async def game_state(request: Request, game_id: str):
     if game_id in games:
         game = games[game_id]
+        etag = f'"{game.id}-{game.state_version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
         return Response(
-            content=pickle.dumps(game), media_type="application/octet-stream"
+            content=encoded_state(game),
+            media_type="application/octet-stream",
+            headers=headers,
         )
     else:
         return Response(content="Game with given id does not exist", status_code=400)
@@ -152,9 +278,15 @@ async def get_players(game_id: str):
         return Response(content="Game with given id does not exist", status_code=400)
 
 
+@app.get("/connection_metrics", dependencies=[Depends(require_api_key)])
+async def connection_metrics():
+    return manager.metrics()
+
+
 @app.websocket("/ws/{game_id}")
-async def ws_game(websocket: WebSocket, game_id: str):
-    await manager.connect(websocket, game_id)
+async def ws_game(websocket: WebSocket, game_id: str, encoding: str = "json"):
+    """Clients asking for binary encoding get flagged, optionally deflated frames."""
+    await manager.connect(websocket, game_id, encoding == "binary")
     try:
         while True:
             await websocket.receive_json()
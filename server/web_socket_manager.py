@@ -1,34 +1,191 @@
+import asyncio
+import time
+import zlib
+from functools import cached_property
+
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
-from typing_extensions import Any, Dict, List
+from typing_extensions import Any, Dict, List, Optional, Set, Tuple
+
+from common.constants import (BROADCAST_COMPRESSION_LEVEL,
+                              BROADCAST_COMPRESSION_THRESHOLD, SEND_QUEUE_SIZE,
+                              SLOW_CONSUMER_POLICY)
+from common.enums import SlowConsumerPolicy
+from common.sync import COMPRESSED_FRAME, RAW_FRAME
+
+
+class Frame:
+    """A broadcast encoded once and shared by every connection it is queued on."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.payload = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    @cached_property
+    def text(self) -> str:
+        return self.payload.decode()
+
+    @cached_property
+    def binary(self) -> bytes:
+        """A flag byte, then the JSON, deflated when it is large enough to pay off."""
+        if len(self.payload) < BROADCAST_COMPRESSION_THRESHOLD:
+            return RAW_FRAME + self.payload
+        return COMPRESSED_FRAME + zlib.compress(
+            self.payload, BROADCAST_COMPRESSION_LEVEL
+        )
+
+
+class Connection:
+    """A socket with its own send queue, drained by a dedicated writer task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int, binary: bool = False):
+        self.websocket = websocket
+        self.binary = binary
+        self.queue: asyncio.Queue[Tuple[float, Optional[Frame]]] = asyncio.Queue(
+            queue_size
+        )
+        self.writer: Optional[asyncio.Task] = None
+        self.close_code = 1000
+        self.sent = 0
+        self.dropped = 0
+        self.max_queue_depth = 0
+        self.total_send_latency = 0.0
+        self.max_send_latency = 0.0
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "mean_send_latency": self.total_send_latency / max(self.sent, 1),
+            "max_send_latency": self.max_send_latency,
+        }
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(
+        self,
+        queue_size: int = SEND_QUEUE_SIZE,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy(SLOW_CONSUMER_POLICY),
+    ):
+        self.active_connections: Dict[str, List[Connection]] = {}
+        self.queue_size = queue_size
+        self.policy = policy
+        self.slow_disconnects = 0
+        self.closing: Set[asyncio.Task] = set()
 
-    async def connect(self, websocket: WebSocket, game_id: str):
+    async def connect(self, websocket: WebSocket, game_id: str, binary: bool = False):
         await websocket.accept()
-        self.active_connections[game_id].append(websocket)
+        connection = Connection(websocket, self.queue_size, binary)
+        connection.writer = asyncio.create_task(self.write(connection, game_id))
+        self.active_connections[game_id].append(connection)
 
     async def disconnect(self, websocket: WebSocket, game_id: str):
         if game_id in self.active_connections:
+            for connection in self.active_connections[game_id]:
+                if connection.websocket is websocket:
+                    self.remove(connection, game_id)
+                    break
+
+    def unregister(self, connection: Connection, game_id: str):
+        try:
+            self.active_connections[game_id].remove(connection)
+        except (KeyError, ValueError):
+            pass
+
+    def remove(self, connection: Connection, game_id: str):
+        self.unregister(connection, game_id)
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def close(self, connection: Connection, game_id: str, code: int):
+        """Drops what is queued and has the writer close the socket after it."""
+        self.unregister(connection, game_id)
+        queue = connection.queue
+        while not queue.empty():
+            queue.get_nowait()
+            connection.dropped += 1
+        connection.close_code = code
+        queue.put_nowait((time.perf_counter(), None))
+        if connection.writer:
+            self.closing.add(connection.writer)
+            connection.writer.add_done_callback(self.closing.discard)
+
+    async def write(self, connection: Connection, game_id: str):
+        while True:
+            queued_at, frame = await connection.queue.get()
             try:
-                self.active_connections[game_id].remove(websocket)
-            except ValueError:
-                pass
+                if frame is None:
+                    await connection.websocket.close(code=connection.close_code)
+                    return
+                if connection.binary:
+                    await connection.websocket.send_bytes(frame.binary)
+                else:
+                    await connection.websocket.send_text(frame.text)
+            except (WebSocketDisconnect, RuntimeError):
+                self.remove(connection, game_id)
+                return
+            latency = time.perf_counter() - queued_at
+            connection.sent += 1
+            connection.total_send_latency += latency
+            connection.max_send_latency = max(connection.max_send_latency, latency)
+
+    def enqueue(self, connection: Connection, frame: Frame, game_id: str):
+        """Queues without waiting; a full queue is handled by the slow-consumer policy."""
+        item = (time.perf_counter(), frame)
+        queue = connection.queue
+        if queue.full():
+            if self.policy == SlowConsumerPolicy.DROP:
+                connection.dropped += 1
+                return
+            if self.policy == SlowConsumerPolicy.DISCONNECT:
+                self.slow_disconnects += 1
+                self.close(connection, game_id, 1013)
+                return
+            while not queue.empty():
+                queue.get_nowait()
+                connection.dropped += 1
+        queue.put_nowait(item)
+        connection.max_queue_depth = max(connection.max_queue_depth, queue.qsize())
 
     async def broadcast(self, data: Dict[str, Any], game_id: str):
-        if game_id in self.active_connections:
-            for connection in self.active_connections[game_id]:
-                try:
-                    await connection.send_json(data)
-                except WebSocketDisconnect:
-                    await self.disconnect(connection, game_id)
+        if self.active_connections.get(game_id):
+            frame = Frame(data)
+            for connection in list(self.active_connections[game_id]):
+                self.enqueue(connection, frame, game_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        games = {}
+        for game_id, connections in self.active_connections.items():
+            metrics = [connection.metrics() for connection in connections]
+            sent = sum(entry["sent"] for entry in metrics)
+            games[game_id] = {
+                "connections": len(connections),
+                "queue_depth": sum(entry["queue_depth"] for entry in metrics),
+                "max_queue_depth": max(
+                    (entry["max_queue_depth"] for entry in metrics), default=0
+                ),
+                "sent": sent,
+                "dropped": sum(entry["dropped"] for entry in metrics),
+                "mean_send_latency": sum(
+                    connection.total_send_latency for connection in connections
+                )
+                / max(sent, 1),
+                "max_send_latency": max(
+                    (entry["max_send_latency"] for entry in metrics), default=0.0
+                ),
+            }
+        return {
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "slow_disconnects": self.slow_disconnects,
+            "games": games,
+        }
 
     async def cleanup_game(self, game_id: str):
         if game_id in self.active_connections:
-            for connection in self.active_connections[game_id]:
-                await self.disconnect(connection, game_id)
+            for connection in list(self.active_connections[game_id]):
+                self.remove(connection, game_id)
             del self.active_connections[game_id]
 
     async def cleanup(self):
@@ -0,0 +1,187 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from typing_extensions import Any, Dict, List, Optional, Sequence
+
+import common.constants as constants
+from common.ai import candidate_moves, plan_turn
+from common.enums import BotType, Corner
+from common.game import Game, Player, War, compile_constant_tables
+
+RANDOM_POLICY = "Random"
+
+default_constants: Dict[str, Any] = {
+    name: getattr(constants, name) for name in dir(constants) if name.isupper()
+}
+counter_names = (
+    "HEAVILY_COUNTERS",
+    "COUNTERS",
+    "NEUTRAL",
+    "COUNTERED",
+    "HEAVILY_COUNTERED",
+)
+counter_levels = {
+    soldier_type_1: {
+        soldier_type_2: next(
+            name for name in counter_names if default_constants[name] == value
+        )
+        for soldier_type_2, value in row.items()
+    }
+    for soldier_type_1, row in War.counter_matrix.items()
+}
+corner_order: List[Corner] = list(Corner)
+curve_fields = ("tiles", "army", "buildings", "food", "wood", "metal")
+
+
+def apply_overrides(overrides: Dict[str, Any]):
+    """Sets constants everywhere they were star-imported, then recompiles tables."""
+    unknown = set(overrides) - set(default_constants)
+    if unknown:
+        raise ValueError(f"Unknown constants: {', '.join(sorted(unknown))}")
+    values = {**default_constants, **overrides}
+    for name, module in list(sys.modules.items()):
+        if name == "common" or not name.startswith("common."):
+            continue
+        for constant, value in values.items():
+            if hasattr(module, constant):
+                setattr(module, constant, value)
+    compile_constant_tables(
+        {
+            soldier_type_1: {
+                soldier_type_2: values[level] for soldier_type_2, level in row.items()
+            }
+            for soldier_type_1, row in counter_levels.items()
+        }
+    )
+
+
+def play_turn(game: Game, player: Player, rng: np.random.Generator):
+    if player.bot_type:
+        moves = plan_turn(game, player.id)
+    else:
+        candidates = candidate_moves(game, player)
+        moves = [candidates[rng.integers(len(candidates))]] if candidates else []
+    if not (moves and game.apply_moves(moves)):
+        game.pass_turn(player.id)
+
+
+def faction_row(player: Player) -> List[float]:
+    faction = player.faction
+    territory = faction.territory
+    return [
+        territory.tile_count if territory else 0,
+        territory.army_size if territory else 0,
+        territory.building_count if territory else 0,
+        *faction.resources.to_tuple(),
+    ]
+
+
+def simulate_game(
+    game_index: int,
+    seed: int,
+    policies: Sequence[str],
+    board_size: int,
+    ocean_width: int,
+    max_rounds: int,
+    overrides: Dict[str, Any],
+) -> Dict[str, np.ndarray]:
+    apply_overrides(overrides)
+    start = time.perf_counter()
+    game = Game(board_size, ocean_width, seed)
+    rng = np.random.default_rng(seed)
+    corners = {}
+    for policy in policies:
+        corner = game.get_empty_corner()
+        bot_type = None if policy == RANDOM_POLICY else BotType(policy)
+        player_id = game.add_player(policy, corner, bot_type)
+        corners[player_id] = corner_order.index(corner)
+    game.start()
+
+    curves = []
+    while game.round < max_rounds:
+        alive = [player for player in game.players if faction_row(player)[0]]
+        if len(alive) <= 1:
+            break
+        player = game.current_player()
+        current_round = game.round
+        if faction_row(player)[0]:
+            play_turn(game, player, rng)
+        else:
+            game.pass_turn(player.id)
+        if game.round != current_round:
+            for player in game.players:
+                curves.append(
+                    [game_index, game.round, corners[player.id], *faction_row(player)]
+                )
+
+    tiles = {player.id: faction_row(player)[0] for player in game.players}
+    most_tiles = max(tiles.values())
+    leaders = [player_id for player_id, count in tiles.items() if count == most_tiles]
+    curves = np.array(curves, dtype=float).reshape(-1, 3 + len(curve_fields))
+    return {
+        "games_index": np.array([game_index]),
+        "games_seed": np.array([seed], dtype=np.uint64),
+        "games_winner": np.array([corners[leaders[0]] if len(leaders) == 1 else -1]),
+        "games_corners": np.array([list(corners.values())]),
+        "games_rounds": np.array([game.round]),
+        "games_seconds": np.array([time.perf_counter() - start]),
+        "curves_game": curves[:, 0].astype(np.int64),
+        "curves_round": curves[:, 1].astype(np.int64),
+        "curves_corner": curves[:, 2].astype(np.int64),
+        **{
+            f"curves_{field}": curves[:, 3 + index]
+            for index, field in enumerate(curve_fields)
+        },
+    }
+
+
+def run(
+    game_count: int = 100,
+    policies: Sequence[str] = (BotType.WEAK, RANDOM_POLICY),
+    board_size: int = constants.DEFAULT_BOARD_SIZE,
+    ocean_width: int = constants.DEFAULT_OCEAN_WIDTH,
+    max_rounds: int = 50,
+    overrides: Optional[Dict[str, Any]] = None,
+    workers: Optional[int] = None,
+    output: str = "self_play.npz",
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """Plays games in a process pool and writes one column per statistic to an npz."""
+    if not 1 <= len(policies) <= len(corner_order):
+        raise ValueError(f"Between 1 and {len(corner_order)} policies are needed")
+    overrides = overrides or {}
+    apply_overrides(overrides)
+    seeds = [
+        int(sequence.generate_state(1, np.uint64)[0])
+        for sequence in np.random.SeedSequence(seed).spawn(game_count)
+    ]
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(
+            executor.map(
+                simulate_game,
+                range(game_count),
+                seeds,
+                [policies] * game_count,
+                [board_size] * game_count,
+                [ocean_width] * game_count,
+                [max_rounds] * game_count,
+                [overrides] * game_count,
+            )
+        )
+    columns = {
+        name: np.concatenate([result[name] for result in results])
+        for name in results[0]
+    }
+    np.savez_compressed(output, **columns)
+
+    winners = columns["games_winner"]
+    print(f"{'corner':>14} {'policy':>8} {'win rate':>9}")
+    for corner_index, policy in zip(columns["games_corners"][0], policies):
+        win_rate = float((winners == corner_index).mean())
+        print(f"{corner_order[corner_index]:>14} {policy:>8} {win_rate:>9.2%}")
+    print(f"{'draws':>23} {float((winners == -1).mean()):>9.2%}")
+    print(f"mean length: {columns['games_rounds'].mean():.1f} rounds")
+    print(f"results written to {output}")
+    return columns
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from typing_extensions import Callable, Optional
+
+from common.ai import candidate_moves
+from common.game import Game
+from simulation.self_play import apply_overrides
+
+PLAYABLE_CONSTANTS = {
+    "TILE_BUILDING_CAPACITY": 4,
+    "HOUSE_CAPACITY": 10,
+    "MILITARY_CAMP_CAPACITY": 5,
+    "PRODUCTION_BUILDING_WORKER_CAPACITY": 4,
+    "BOT_BASE_ARMY_SIZE": 3,
+    "BOT_HP": 1.0,
+    "INITIAL_RESOURCES": (50.0, 50.0, 50.0),
+}
+
+
+def start_game(seed: int = 7, board_size: int = 12, player_count: int = 2) -> Game:
+    game = Game(board_size, 2, seed)
+    for index in range(player_count):
+        game.add_player(f"Player {index + 1}", game.get_empty_corner())
+    game.start()
+    return game
+
+
+def play_randomly(
+    game: Game,
+    turn_count: int,
+    seed: int = 0,
+    after_turn: Optional[Callable[[Game], None]] = None,
+) -> Game:
+    rng = np.random.default_rng(seed)
+    for _ in range(turn_count):
+        player = game.current_player()
+        candidates = candidate_moves(game, player)
+        if not (
+            candidates and game.apply_moves([candidates[rng.integers(len(candidates))]])
+        ):
+            game.pass_turn(player.id)
+        if after_turn:
+            after_turn(game)
+    return game
+
+
+@pytest.fixture
+def new_game() -> Callable[..., Game]:
+    """Builds started games; takes the seed, board size and player count."""
+    return start_game
+
+
+@pytest.fixture
+def game(new_game) -> Game:
+    return new_game()
+
+
+@pytest.fixture
+def playable():
+    """Costs and capacities that let random play build, recruit and fight."""
+    apply_overrides(PLAYABLE_CONSTANTS)
+    yield play_randomly
+    apply_overrides({})
@@ -0,0 +1,39 @@
+import time
+
+from common.ai import bot_settings, candidate_moves, search_turn
+from common.enums import BotType, MoveTypes
+from common.game import Game
+from common.serialization import tile_fields
+from common.sync import building_records
+
+
+def game_state(game: Game) -> tuple:
+    board = game.board
+    return (
+        [getattr(board, name).tobytes() for name, _, _ in tile_fields],
+        building_records(board),
+        [faction.resources.to_tuple() for faction in board.factions],
+        game.rng.bit_generator.state,
+    )
+
+
+def test_candidate_moves_stop_at_the_limit_and_deadline(new_game, playable):
+    game = playable(new_game(), 20)
+    player = game.current_player()
+    moves = candidate_moves(game, player)
+    assert len({move.action_type for move in moves}) > 1
+    limited = candidate_moves(game, player, limit=3)
+    assert len(limited) == 3
+    assert len({move.action_type for move in limited}) > 1
+    assert candidate_moves(game, player, deadline=time.monotonic() - 1) == []
+
+
+def test_search_leaves_the_game_untouched(new_game, playable):
+    game = playable(new_game(), 20)
+    player = game.current_player()
+    state = game_state(game)
+    plan = search_turn(game, player.id, bot_settings[BotType.MEDIUM])
+    assert plan.moves
+    assert all(move.action_type != MoveTypes.ARMY for move in plan.moves[:-1])
+    assert game_state(game) == state
+    assert game.apply_moves(plan.moves)
@@ -0,0 +1,53 @@
+from common.constants import SPATIAL_INDEX_CACHE_SIZE
+from common.game import Board, Farm, Worker
+
+
+def test_territory_tracks_what_stays_connected_to_the_capital(game):
+    board = game.board
+    faction = game.players[0].faction
+    territory = faction.territory
+    x, y = territory.capital
+    step = 1 if x == 0 else -1
+    chain = [(x + step * offset, y) for offset in range(1, 4)]
+    for tile_x, tile_y in chain:
+        board.tiles[tile_x][tile_y].change_faction(faction)
+    assert all(territory.connected_to_capital(*coordinates) for coordinates in chain)
+    assert territory.capital_component_size() == 4
+
+    board.tiles[chain[1][0]][chain[1][1]].change_faction(None)
+    assert territory.connected_to_capital(*chain[0])
+    assert not territory.connected_to_capital(*chain[1])
+    assert not territory.connected_to_capital(*chain[2])
+    assert territory.capital_component_size() == 2
+
+
+def test_changing_hands_sends_the_residents_away(game):
+    first, second = game.players
+    x, y = first.faction.territory.capital
+    tile = game.board.tiles[x + 1 if x == 0 else x - 1][y]
+    tile.change_faction(first.faction)
+    farm = Farm(tile)
+    farm.capacity = 4
+    tile.add_building(farm)
+    farm.add_resident(Worker(), 3)
+    assert farm.resident_count == 3
+
+    tile.change_faction(second.faction)
+    assert farm in tile.buildings
+    assert not farm.residents
+    assert farm.have_space(4)
+
+    farm.add_resident(Worker(), 2)
+    farm.clear_residents()
+    assert not farm.residents
+    assert farm.resident_count == 0
+
+
+def test_spatial_indexes_keep_only_recent_board_sizes():
+    first = Board(10, 10, 2)
+    for size in range(11, 12 + SPATIAL_INDEX_CACHE_SIZE):
+        Board(size, size, 2)
+    assert len(Board.spatial_indexes) == SPATIAL_INDEX_CACHE_SIZE
+    assert (10, 10, 2) not in Board.spatial_indexes
+    assert first.neighbor_table.shape == (10, 10, len(Board.neighbor_offsets))
+    assert Board(10, 10, 2).ocean_mask.tolist() == first.ocean_mask.tolist()
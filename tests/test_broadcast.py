@@ -0,0 +1,75 @@
+import asyncio
+import json
+import zlib
+
+from common.enums import InfantryUnitType, SlowConsumerPolicy
+from common.serialization import encode_game
+from common.sync import COMPRESSED_FRAME, StateTracker
+from server.web_socket_manager import ConnectionManager, Frame
+
+
+def test_state_frames_encode_tiles_with_soldiers(game):
+    tracker = StateTracker(game)
+    player = game.players[0]
+    x, y = player.faction.territory.capital
+    game.board.tiles[x][y].soldiers.add(InfantryUnitType.SWORDSMAN, 3)
+    game.state_version += 1
+
+    delta = tracker.delta(game)
+    frame = Frame(delta)
+    assert json.loads(frame.text) == json.loads(json.dumps(delta))
+    indices, counts = json.loads(frame.text)["details"]["tiles"]["army_counts"]
+    assert indices == [x * game.board.height + y]
+    assert sum(counts[0]) == 3
+
+    keyframe = Frame(tracker.keyframe(game, encode_game(game)))
+    assert keyframe.binary[:1] == COMPRESSED_FRAME
+    assert json.loads(zlib.decompress(keyframe.binary[1:]))["type"] == "keyframe"
+
+
+def test_tile_records_use_plain_string_keys(game):
+    player = game.players[0]
+    x, y = player.faction.territory.capital
+    game.board.tiles[x][y].soldiers.add(InfantryUnitType.SWORDSMAN, 3)
+    record = game.board.tile_record(x, y)
+    assert json.loads(Frame(record).text)["soldiers"] == {"Swordsman": 3}
+
+
+class StalledSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+        self.unstall = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await self.unstall.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int):
+        self.close_code = code
+
+
+def test_slow_consumer_is_closed_by_its_writer():
+    async def scenario():
+        manager = ConnectionManager(1, SlowConsumerPolicy.DISCONNECT)
+        manager.active_connections["game"] = []
+        websocket = StalledSocket()
+        await manager.connect(websocket, "game")
+        (connection,) = manager.active_connections["game"]
+        for index in range(3):
+            await manager.broadcast({"index": index}, "game")
+            await asyncio.sleep(0)
+        assert manager.slow_disconnects == 1
+        assert not manager.active_connections["game"]
+        assert connection.writer in manager.closing
+
+        websocket.unstall.set()
+        await asyncio.wait_for(connection.writer, 1)
+        assert websocket.close_code == 1013
+        assert [json.loads(text)["index"] for text in websocket.sent] == [0]
+        assert not manager.closing
+
+    asyncio.run(scenario())
@@ -0,0 +1,24 @@
+import numpy as np
+
+from common.game import Economy
+
+
+def settle_one_by_one(
+    resources: np.ndarray, consumptions: np.ndarray, productions: np.ndarray
+):
+    for consumption, production in zip(consumptions, productions):
+        if (resources >= consumption).all():
+            resources += production - consumption
+
+
+def test_settle_matches_paying_workers_in_order():
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        worker_count = int(rng.integers(0, 30))
+        consumptions = rng.integers(0, 4, (worker_count, 3)).astype(float)
+        productions = rng.integers(0, 4, (worker_count, 3)).astype(float)
+        resources = rng.integers(0, 10, 3).astype(float)
+        expected = resources.copy()
+        settle_one_by_one(expected, consumptions, productions)
+        Economy.settle(resources, consumptions, productions)
+        assert np.array_equal(resources, expected)
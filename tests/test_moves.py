@@ -0,0 +1,163 @@
+import numpy as np
+import pytest
+
+from common.enums import BuildingType, InfantryUnitType, MoveTypes
+from common.game import Farm, Game, Move, War, Worker
+from common.models import MakeMove
+
+
+def prepare_battle(game: Game) -> Game:
+    """Puts an enemy-owned, unguarded tile with a tower next to the first capital."""
+    first, second = game.players
+    x, y = first.faction.territory.capital
+    board = game.board
+    board.tiles[x][y].soldiers.add(InfantryUnitType.SWORDSMAN, 10)
+    target = board.tiles[x + 1 if x + 1 < board.width else x - 1][y]
+    target.change_faction(second.faction)
+    target.tower_count = 1
+    return game
+
+
+@pytest.fixture
+def game(game) -> Game:
+    return prepare_battle(game)
+
+
+def attack(game: Game) -> MakeMove:
+    player = game.players[0]
+    x, y = player.faction.territory.capital
+    return MakeMove(
+        player_id=player.id,
+        first_tile=(x, y),
+        second_tile=(x + 1 if x + 1 < game.board.width else x - 1, y),
+        action_type=MoveTypes.ARMY,
+        amount=1.0,
+    )
+
+
+def test_attacking_an_unguarded_tile_with_towers_keeps_counts_valid(game):
+    result = game.make_move(attack(game))
+    assert result
+    assert (game.board.army_counts >= 0).all()
+    (battle,) = result.battles
+    assert all(np.isfinite(value) for value in battle.values())
+
+
+@pytest.mark.parametrize(
+    "outcome",
+    [
+        (np.nan, np.nan, np.nan, np.nan),
+        (-0.5, 1.5, -1.0, np.inf),
+    ],
+)
+def test_army_move_clamps_invalid_damage_rates(game, monkeypatch, outcome):
+    monkeypatch.setattr(War, "result", lambda self: outcome)
+    result = game.make_move(attack(game))
+    assert result
+    assert (game.board.army_counts >= 0).all()
+    for battle in result.battles:
+        assert all(np.isfinite(value) for value in battle.values())
+    for row in game.board.tiles:
+        for tile in row:
+            len(tile.soldiers)
+
+
+def test_move_that_raises_rolls_back_the_batch(game, monkeypatch):
+    def fail(self):
+        raise RuntimeError("battle failed")
+
+    monkeypatch.setattr(War, "result", fail)
+    player = game.players[0]
+    army_counts = game.board.army_counts.copy()
+    faction_ids = game.board.faction_ids.copy()
+    with pytest.raises(RuntimeError):
+        game.make_move(attack(game))
+    assert np.array_equal(game.board.army_counts, army_counts)
+    assert np.array_equal(game.board.faction_ids, faction_ids)
+    assert game.current_player() is player
+    assert not game.move_log
+
+
+def test_undo_puts_a_capture_back_in_place(game):
+    first, second = game.players
+    x, y = attack(game).second_tile
+    target = game.board.tiles[x][y]
+    target.tower_count = 0
+    target.hp = 0
+    board = game.board
+    arrays = {name: getattr(board, name).copy() for name in board.state_arrays}
+    tile_counts = [player.faction.territory.tile_count for player in game.players]
+    assert game.make_move(attack(game))
+    assert board.faction_ids[x, y] == board.register_faction(first.faction)
+    assert game.undo(first.id)
+    assert game.players == [first, second]
+    assert game.current_player() is first
+    for name, array in arrays.items():
+        assert np.array_equal(getattr(board, name), array)
+    assert [
+        player.faction.territory.tile_count for player in game.players
+    ] == tile_counts
+    assert not game.undo(first.id)
+
+
+def test_battles_depend_only_on_the_game_seed(new_game):
+    first = prepare_battle(new_game(3))
+    second = prepare_battle(new_game(3))
+    first_result = first.make_move(attack(first))
+    second_result = second.make_move(attack(second))
+    assert first_result.battles == second_result.battles
+    assert np.array_equal(first.board.army_counts, second.board.army_counts)
+    assert first.rng.bit_generator.state == second.rng.bit_generator.state
+
+
+def test_transfer_moves_residents_in_bulk(new_game):
+    game = new_game()
+    player = game.players[0]
+    x, y = player.faction.territory.capital
+    board = game.board
+    neighbor = board.tiles[x][y + 1 if y + 1 < board.height else y - 1]
+    neighbor.change_faction(player.faction)
+    source, destination = Farm(board.tiles[x][y]), Farm(neighbor)
+    for building in (source, destination):
+        building.capacity = 10
+        building.tile.add_building(building)
+    source.add_resident(Worker(), 7)
+    result = game.make_move(
+        MakeMove(
+            player_id=player.id,
+            first_tile=(x, y),
+            second_tile=(neighbor.x, neighbor.y),
+            action_type=MoveTypes.TRANSFER,
+            target=source.building_type,
+            amount=5.0,
+        )
+    )
+    assert result
+    assert source.resident_count == 2
+    assert destination.resident_count == 5
+    assert source.remove_resident(Worker().get_properties(), 3) is None
+
+
+@pytest.mark.parametrize("amount", [float("nan"), float("inf"), 3e9, 2.5, -1e12])
+@pytest.mark.parametrize(
+    "action_type, target",
+    [
+        (MoveTypes.CREATE, InfantryUnitType.SWORDSMAN),
+        (MoveTypes.TRANSFER, BuildingType.FARM),
+    ],
+)
+def test_parse_rejects_unusable_amounts(game, action_type, target, amount):
+    player = game.players[0]
+    x, y = player.faction.territory.capital
+    request = MakeMove(
+        player_id=player.id,
+        first_tile=(x, y),
+        second_tile=(x, y + 1),
+        action_type=action_type,
+        amount=1.0,
+        target=target,
+    )
+    assert Move.parse(player, request) is not None
+    request.amount = amount
+    assert Move.parse(player, request) is None
+    assert game.make_move(request) is None
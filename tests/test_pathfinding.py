@@ -0,0 +1,48 @@
+from common.constants import ARMY_MOVE_BUDGET, ATTACK_MOVE_PER_TILE
+from common.game import Dock
+
+
+def claim_all_land(game):
+    board = game.board
+    faction = game.players[0].faction
+    for row in board.tiles:
+        for tile in row:
+            if not board.ocean_mask[tile.x, tile.y]:
+                tile.change_faction(faction)
+    return board.register_faction(faction)
+
+
+def test_search_stops_at_the_move_budget(new_game):
+    game = new_game(board_size=48)
+    faction_id = claim_all_land(game)
+    source = game.players[0].faction.territory.capital
+    tree = game.board.pathfinder.search_tree(faction_id, source)
+    steps = int(ARMY_MOVE_BUDGET / ATTACK_MOVE_PER_TILE)
+    assert max(tree.costs.values()) <= ARMY_MOVE_BUDGET
+    assert len(tree.costs) <= (2 * steps + 1) ** 2
+    far = (game.board.width - 1 - source[0], game.board.height - 1 - source[1])
+    assert game.board.pathfinder.path_cost(faction_id, source, far) is None
+
+
+def test_armies_cross_the_ocean_between_owned_docks(new_game):
+    game = new_game(board_size=16)
+    board = game.board
+    faction = game.players[0].faction
+    route = [(5, 4), (6, 4), (9, 4), (10, 4)]
+    for x, y in route:
+        board.tiles[x][y].change_faction(faction)
+    faction_id = board.register_faction(faction)
+    pathfinder = board.pathfinder
+    assert pathfinder.path_cost(faction_id, route[0], route[-1]) is None
+    assert not board.naval.can_transport(faction_id, route[1], route[2])
+
+    for x, y in route[1:3]:
+        board.tiles[x][y].add_building(Dock(board.tiles[x][y]))
+    assert board.naval.can_transport(faction_id, route[1], route[2])
+    path = pathfinder.find_path(faction_id, route[0], route[-1])
+    assert path.tiles == route
+    assert path.cost == 5 * ATTACK_MOVE_PER_TILE
+
+    board.tiles[9][4].change_faction(game.players[1].faction)
+    assert not board.naval.can_transport(faction_id, route[1], route[2])
+    assert pathfinder.path_cost(faction_id, route[0], route[-1]) is None
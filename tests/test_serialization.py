@@ -0,0 +1,27 @@
+from common.game import Game
+from common.serialization import decode_game, encode_game
+from common.sync import building_records
+
+
+def test_decoding_an_encoded_game_restores_it(new_game, playable):
+    game = playable(new_game(board_size=16, player_count=3), 150)
+    state = encode_game(game)
+    decoded = decode_game(bytearray(state))
+    assert encode_game(decoded) == state
+    assert building_records(decoded.board) == building_records(game.board)
+    assert decoded.board.naval.crossings == game.board.naval.crossings
+    assert [player.id for player in decoded.turn_queue] == [
+        player.id for player in game.turn_queue
+    ]
+    assert [faction.territory.tile_count for faction in decoded.board.factions] == [
+        faction.territory.tile_count for faction in game.board.factions
+    ]
+
+
+def test_replaying_the_record_rebuilds_the_game(new_game, playable):
+    game = playable(new_game(board_size=16, player_count=3), 150)
+    assert game.board.army_counts.any()
+    assert max(faction.territory.tile_count for faction in game.board.factions) > 1
+    replayed = Game.replay(game.replay_record())
+    replayed.id = game.id
+    assert encode_game(replayed) == encode_game(game)
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+import server.main as server
+from common.enums import InfantryUnitType, MoveTypes
+
+
+def test_make_move_answers_with_the_result():
+    with TestClient(server.app) as client:
+        game_id = client.post("/new_game", json={"seed": 3}).json()["game_id"]
+        player_id = client.post(
+            "/add_player", json={"game_id": game_id, "player_name": "First"}
+        ).json()["player_id"]
+        client.post("/add_player", json={"game_id": game_id, "player_name": "Second"})
+        client.post("/start_game", json={"game_id": game_id})
+        game = server.games[game_id]
+        x, y = game.get_player(player_id).faction.territory.capital
+        game.board.tiles[x][y].soldiers.add(InfantryUnitType.SWORDSMAN, 4)
+        target = x + 1 if x + 1 < game.board.width else x - 1
+        response = client.post(
+            "/make_move",
+            json={
+                "game_id": game_id,
+                "player_id": player_id,
+                "first_tile": [x, y],
+                "second_tile": [target, y],
+                "action_type": MoveTypes.ARMY,
+                "amount": 0.5,
+            },
+        )
+        assert response.status_code == 200
+        details = response.json()["details"]
+        assert details["player_id"] == player_id
+        assert details["moves"] == [MoveTypes.ARMY]
+        assert {(tile["x"], tile["y"]) for tile in details["tiles"]} == {
+            (x, y),
+            (target, y),
+        }
+
+
+def test_new_game_rejects_negative_seeds():
+    with TestClient(server.app) as client:
+        assert client.post("/new_game", json={"seed": -1}).status_code == 422
+        response = client.post("/new_game", json={"seed": 0})
+        assert response.status_code == 200
+        assert response.json()["seed"] == 0
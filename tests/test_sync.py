@@ -0,0 +1,48 @@
+import json
+
+from common.game import Game
+from common.serialization import encode_game, tile_fields
+from common.sync import (StateTracker, apply_delta, building_records,
+                         read_keyframe)
+from server.web_socket_manager import Frame
+
+
+def send(message: dict) -> dict:
+    return json.loads(Frame(message).text)
+
+
+def synced_state(game: Game) -> tuple:
+    board = game.board
+    return (
+        [getattr(board, name).tobytes() for name, _, _ in tile_fields],
+        building_records(board),
+        [faction.resources.to_tuple() for faction in board.factions],
+        [faction.territory.tile_count for faction in board.factions],
+        [player.id for player in game.turn_queue],
+        board.naval.crossings,
+        (game.turn_count, game.round, game.state_version),
+    )
+
+
+def test_applied_deltas_match_the_keyframe(new_game, playable):
+    game = new_game(board_size=16, player_count=3)
+    tracker = StateTracker(game)
+    client = read_keyframe(send(tracker.keyframe(game, encode_game(game))))
+
+    def sync(game: Game):
+        assert apply_delta(client, send(tracker.delta(game)))
+        assert synced_state(client) == synced_state(game)
+
+    playable(game, 150, after_turn=sync)
+    assert max(faction.territory.tile_count for faction in game.board.factions) > 1
+    keyframe = read_keyframe(send(tracker.keyframe(game, encode_game(game))))
+    assert synced_state(client) == synced_state(keyframe)
+
+
+def test_delta_is_refused_at_the_wrong_base(game):
+    tracker = StateTracker(game)
+    client = read_keyframe(send(tracker.keyframe(game, encode_game(game))))
+    game.pass_turn(game.current_player().id)
+    tracker.delta(game)
+    game.pass_turn(game.current_player().id)
+    assert not apply_delta(client, send(tracker.delta(game)))
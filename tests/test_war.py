@@ -0,0 +1,68 @@
+import numpy as np
+
+from common.enums import InfantryUnitType
+from common.game import Army, War, soldier_type_order
+
+
+def swordsmen(count: int) -> Army:
+    army = Army()
+    army.add(InfantryUnitType.SWORDSMAN, count)
+    return army
+
+
+def test_towers_without_soldiers_defend_with_their_archers():
+    war = War(swordsmen(5), Army(), 1, 0, np.random.default_rng(0))
+    outcome = war.result()
+    assert np.isfinite(outcome).all()
+    attacker_damage, defender_damage, _, tile_damage = outcome
+    assert 0 < attacker_damage < 1
+    assert 0 <= defender_damage <= 1
+    assert 0 < tile_damage <= 1
+    means = war.predict(100).means
+    assert all(np.isfinite(value) for value in means.values())
+
+
+def test_empty_defender_without_towers_takes_full_damage():
+    war = War(swordsmen(5), Army(), 0, 0, np.random.default_rng(0))
+    assert war.result() == (0.0, 1.0, 0.0, 0.0)
+
+
+def test_win_probability_counts_tower_archers():
+    attacker = swordsmen(5)
+    prediction = War(attacker, Army(), 1, 0, np.random.default_rng(0)).predict()
+    routs = np.mean(
+        [
+            War(attacker, Army(), 1, 0, np.random.default_rng(seed)).result()[1] >= 1
+            for seed in range(2000)
+        ]
+    )
+    assert prediction.win_probability < 0.05
+    assert abs(prediction.win_probability - routs) < 0.01
+
+
+def test_win_probability_against_an_undefended_tile_is_certain():
+    prediction = War(swordsmen(5), Army(), 0, 0, np.random.default_rng(0)).predict()
+    assert prediction.win_probability == 1.0
+
+
+def test_batched_battles_match_battles_fought_one_by_one():
+    rng = np.random.default_rng(4)
+    attackers = rng.integers(0, 6, (5, len(soldier_type_order)))
+    defenders = rng.integers(0, 6, (5, len(soldier_type_order)))
+    defenders[0] = 0
+    towers = rng.integers(0, 3, 5)
+    walls = rng.uniform(0, 2, 5)
+    batch = War.resolve_batch(
+        attackers, defenders, towers, walls, np.random.default_rng(11)
+    )
+
+    battle_rng = np.random.default_rng(11)
+    for row in range(5):
+        war = War(
+            Army(attackers[row]),
+            Army(defenders[row]),
+            towers[row],
+            walls[row],
+            battle_rng,
+        )
+        assert np.allclose(war.result(), [outcome[row] for outcome in batch])